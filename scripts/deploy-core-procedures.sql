@@ -417,18 +417,53 @@ def run(session, intent):
 $$;
 
 -- ===================================================================
--- 3. GRANTS - Secure access for procedures
+-- 3. COMPILE_AND_RUN_NL - Compile and execute in a single round-trip
+-- ===================================================================
+
+CREATE OR REPLACE PROCEDURE MCP.COMPILE_AND_RUN_NL(INTENT VARIANT)
+RETURNS VARIANT
+LANGUAGE SQL
+EXECUTE AS OWNER
+COMMENT = 'Compile natural language to a plan and run it server-side'
+AS
+$$
+DECLARE
+  compiled VARIANT;
+  plan VARIANT;
+  result VARIANT;
+BEGIN
+  CALL MCP.COMPILE_NL_PLAN(:INTENT) INTO :compiled;
+  
+  -- Compilation failures are returned as-is so the client reports them
+  IF (NOT COALESCE(compiled:ok::BOOLEAN, FALSE)) THEN
+    RETURN compiled;
+  END IF;
+  
+  plan := compiled:plan;
+  CALL MCP.RUN_PLAN(:plan) INTO :result;
+  
+  RETURN OBJECT_CONSTRUCT(
+    'ok', TRUE,
+    'compile', compiled,
+    'result', result
+  );
+END;
+$$;
+
+-- ===================================================================
+-- 4. GRANTS - Secure access for procedures
 -- ===================================================================
 
 -- Grant execution privileges to Claude agent role
 GRANT EXECUTE ON PROCEDURE MCP.RUN_PLAN(VARIANT) TO ROLE R_CLAUDE_AGENT;
 GRANT EXECUTE ON PROCEDURE MCP.COMPILE_NL_PLAN(VARIANT) TO ROLE R_CLAUDE_AGENT;
+GRANT EXECUTE ON PROCEDURE MCP.COMPILE_AND_RUN_NL(VARIANT) TO ROLE R_CLAUDE_AGENT;
 
 -- Grant usage on external access integration (already done in Phase 1, but ensuring)
 GRANT USAGE ON INTEGRATION MCP.CLAUDE_EAI TO ROLE R_CLAUDE_AGENT;
 
 -- ===================================================================
--- 4. VALIDATION TESTS
+-- 5. VALIDATION TESTS
 -- ===================================================================
 
 -- Test RUN_PLAN with a simple plan
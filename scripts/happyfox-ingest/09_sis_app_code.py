@@ -2,8 +2,10 @@
 # 100% Snowflake Native - Zero External Dependencies
 # Copy this code into Snowsight → Streamlit → Create App
 
+import io
 import streamlit as st
 import pandas as pd
+import pyarrow.csv as pa_csv
 from datetime import datetime
 
 # Page config
@@ -178,15 +180,18 @@ with tab3:
     with col3:
         assignee = st.text_input("Assignee", "")
     
-    # Build search query
-    detail_where = [where_clause]
-    if search_text:
-        detail_where.append(f"LOWER(subject) LIKE LOWER('%{search_text}%')")
+    # Build search query (most selective predicates first)
+    detail_where = []
     if ticket_id:
         detail_where.append(f"display_id = '{ticket_id}'")
     if assignee:
         detail_where.append(f"LOWER(assignee_name) LIKE LOWER('%{assignee}%')")
+    if search_text:
+        detail_where.append(f"LOWER(subject) LIKE LOWER('%{search_text}%')")
+    detail_where.append(where_clause)
     
+    # QUALIFY lets Snowflake stop after the newest 500 matches; the final
+    # ORDER BY only sorts those 500 rows
     detail_query = f"""
     SELECT 
         ticket_id,
@@ -200,8 +205,8 @@ with tab3:
         lifecycle_state
     FROM MCP.VW_HF_TICKETS_EXPORT
     WHERE {' AND '.join(detail_where)}
+    QUALIFY ROW_NUMBER() OVER (ORDER BY created_at DESC) <= 500
     ORDER BY created_at DESC
-    LIMIT 500
     """
     
     detail_df = session.sql(detail_query).to_pandas()
@@ -270,16 +275,25 @@ with tab4:
             ORDER BY created_at DESC
             """
             
-            export_df = session.sql(export_query).to_pandas()
+            # Fetch as Arrow and write CSV in C, skipping the pandas round-trip
+            cursor = session.connection.cursor()
+            try:
+                # An empty result still comes back as a table, so the CSV keeps its header row
+                export_table = cursor.execute(export_query).fetch_arrow_all(force_return_table=True)
+            finally:
+                cursor.close()
             
             # Convert to CSV
-            csv = export_df.to_csv(index=False)
+            csv_buffer = io.BytesIO()
+            pa_csv.write_csv(export_table, csv_buffer)
+            csv = csv_buffer.getvalue()
+            export_rows = export_table.num_rows
             
             # Generate filename
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             filename = f"happyfox_{selected_product.lower()}_{timestamp}.csv"
             
-            st.success(f"✅ Export ready: {len(export_df):,} tickets")
+            st.success(f"✅ Export ready: {export_rows:,} tickets")
             
             # Download button
             st.download_button(
@@ -2,16 +2,18 @@
 """
 Dashboard Schedule Executor
 External worker that processes dashboard schedules
-Runs every minute to check for due schedules
+Runs every minute; the schedule query only re-runs when schedule events change
 """
 
+import asyncio
 import json
 import os
 import sys
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import snowflake.connector
 from snowflake.connector import DictCursor
 import hashlib
+import secrets
 import time
 import logging
 
@@ -22,10 +24,112 @@ logging.basicConfig(
 )
 logger = logging.getLogger('schedule-executor')
 
+POLL_INTERVAL_SECONDS = 60
+MAX_CONCURRENT_SCHEDULES = 8  # matches XS warehouse concurrency
+RERUN_GUARD = timedelta(hours=1)
+
+# Cheap change signal: only re-run the schedule CTE when schedule or
+# snapshot events have been added since the last fetch
+SCHEDULE_WATERMARK_QUERY = """
+SELECT
+    COUNT(*) as event_count,
+    MAX(occurred_at) as last_event_at
+FROM ACTIVITY.EVENTS
+WHERE action IN ('dashboard.schedule_created', 'dashboard.snapshot_generated')
+    AND occurred_at >= DATEADD('day', -30, CURRENT_TIMESTAMP())
+"""
+
+SCHEDULES_QUERY = """
+WITH schedule_events AS (
+    SELECT 
+        payload:attributes:schedule_id::STRING as schedule_id,
+        payload:attributes:dashboard_id::STRING as dashboard_id,
+        payload:attributes:frequency::STRING as frequency,
+        payload:attributes:time::STRING as scheduled_time,
+        payload:attributes:timezone::STRING as timezone,
+        payload:attributes:deliveries as deliveries,
+        payload:attributes:next_run::TIMESTAMP_TZ as next_run,
+        occurred_at
+    FROM ACTIVITY.EVENTS
+    WHERE action = 'dashboard.schedule_created'
+        AND occurred_at >= DATEADD('day', -30, CURRENT_TIMESTAMP())
+),
+latest_schedules AS (
+    SELECT *,
+        ROW_NUMBER() OVER (
+            PARTITION BY dashboard_id 
+            ORDER BY occurred_at DESC
+        ) as rn
+    FROM schedule_events
+),
+last_runs AS (
+    SELECT 
+        payload:attributes:schedule_id::STRING as schedule_id,
+        MAX(occurred_at) as last_run_at
+    FROM ACTIVITY.EVENTS
+    WHERE action = 'dashboard.snapshot_generated'
+    GROUP BY 1
+)
+SELECT 
+    s.schedule_id,
+    s.dashboard_id,
+    s.frequency,
+    s.scheduled_time,
+    s.timezone,
+    s.deliveries,
+    s.next_run,
+    r.last_run_at
+FROM latest_schedules s
+LEFT JOIN last_runs r ON s.schedule_id = r.schedule_id
+WHERE s.rn = 1
+"""
+
+# Panel procedure calls are fixed statements; only validated values are bound
+METRICS_PROC_SQL = """
+CALL MCP.DASH_GET_METRICS(
+    DATEADD('hour', -24, CURRENT_TIMESTAMP()),
+    CURRENT_TIMESTAMP(),
+    NULL
+)
+"""
+
+TOPN_PROC_SQL = """
+CALL MCP.DASH_GET_TOPN(
+    DATEADD('hour', -24, CURRENT_TIMESTAMP()),
+    CURRENT_TIMESTAMP(),
+    ?,
+    NULL,
+    ?
+)
+"""
+
+TOPN_DIMENSIONS = frozenset({'action', 'actor_id', 'object_type', 'source'})
+MAX_TOPN = 1000
+
+def _topn_params(params):
+    """Validate DASH_GET_TOPN panel params into bind values"""
+    dimension = params.get('dimension', 'action')
+    if dimension not in TOPN_DIMENSIONS:
+        raise ValueError(f"Unsupported dimension: {dimension}")
+    n = int(params.get('n', 10))
+    if not 1 <= n <= MAX_TOPN:
+        raise ValueError(f"n must be between 1 and {MAX_TOPN}, got {n}")
+    return (dimension, n)
+
+def _as_utc(ts):
+    """Normalize a connector timestamp to an aware UTC datetime"""
+    if ts is None:
+        return None
+    if ts.tzinfo is None:
+        return ts.replace(tzinfo=timezone.utc)
+    return ts.astimezone(timezone.utc)
+
 class ScheduleExecutor:
     def __init__(self):
         """Initialize connection to Snowflake"""
         self.conn = None
+        self.schedules = []
+        self.watermark = None
         self.connect()
     
     def connect(self):
@@ -41,72 +145,54 @@ class ScheduleExecutor:
                 private_key=private_key,
                 warehouse=os.environ.get('SNOWFLAKE_WAREHOUSE', 'CLAUDE_AGENT_WH'),
                 database='CLAUDE_BI',
-                schema='MCP'
+                schema='MCP',
+                paramstyle='qmark'
             )
             logger.info("Connected to Snowflake")
         except Exception as e:
             logger.error(f"Failed to connect to Snowflake: {e}")
             raise
     
+    def get_schedule_watermark(self):
+        """Fetch the change marker for schedule and snapshot events"""
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(SCHEDULE_WATERMARK_QUERY)
+            return cursor.fetchone()
+        finally:
+            cursor.close()
+    
+    def refresh_schedules(self):
+        """Reload latest schedules only if schedule events changed"""
+        watermark = self.get_schedule_watermark()
+        if watermark == self.watermark:
+            return
+        
+        cursor = self.conn.cursor(DictCursor)
+        try:
+            cursor.execute(SCHEDULES_QUERY)
+            self.schedules = cursor.fetchall()
+        finally:
+            cursor.close()
+        
+        self.watermark = watermark
+        logger.info(f"Loaded {len(self.schedules)} active schedules")
+    
     def get_due_schedules(self):
         """Fetch schedules that are due to run"""
         try:
-            cursor = self.conn.cursor(DictCursor)
-            
-            # Query for schedule events
-            query = """
-            WITH schedule_events AS (
-                SELECT 
-                    payload:attributes:schedule_id::STRING as schedule_id,
-                    payload:attributes:dashboard_id::STRING as dashboard_id,
-                    payload:attributes:frequency::STRING as frequency,
-                    payload:attributes:time::STRING as scheduled_time,
-                    payload:attributes:timezone::STRING as timezone,
-                    payload:attributes:deliveries as deliveries,
-                    payload:attributes:next_run::TIMESTAMP_TZ as next_run,
-                    occurred_at
-                FROM ACTIVITY.EVENTS
-                WHERE action = 'dashboard.schedule_created'
-                    AND occurred_at >= DATEADD('day', -30, CURRENT_TIMESTAMP())
-            ),
-            latest_schedules AS (
-                SELECT *,
-                    ROW_NUMBER() OVER (
-                        PARTITION BY dashboard_id 
-                        ORDER BY occurred_at DESC
-                    ) as rn
-                FROM schedule_events
-            ),
-            last_runs AS (
-                SELECT 
-                    payload:attributes:schedule_id::STRING as schedule_id,
-                    MAX(occurred_at) as last_run_at
-                FROM ACTIVITY.EVENTS
-                WHERE action = 'dashboard.snapshot_generated'
-                GROUP BY 1
-            )
-            SELECT 
-                s.schedule_id,
-                s.dashboard_id,
-                s.frequency,
-                s.scheduled_time,
-                s.timezone,
-                s.deliveries,
-                s.next_run,
-                r.last_run_at
-            FROM latest_schedules s
-            LEFT JOIN last_runs r ON s.schedule_id = r.schedule_id
-            WHERE s.rn = 1
-                AND (
-                    r.last_run_at IS NULL 
-                    OR r.last_run_at < DATEADD('hour', -1, CURRENT_TIMESTAMP())
-                )
-                AND s.next_run <= CURRENT_TIMESTAMP()
-            """
+            self.refresh_schedules()
             
-            cursor.execute(query)
-            schedules = cursor.fetchall()
-            cursor.close()
+            now = datetime.now(timezone.utc)
+            schedules = []
+            for schedule in self.schedules:
+                next_run = _as_utc(schedule['NEXT_RUN'])
+                last_run_at = _as_utc(schedule['LAST_RUN_AT'])
+                if next_run is None or next_run > now:
+                    continue
+                if last_run_at is not None and last_run_at >= now - RERUN_GUARD:
+                    continue
+                schedules.append(schedule)
             
             logger.info(f"Found {len(schedules)} schedules due to run")
             return schedules
@@ -121,16 +207,16 @@ class ScheduleExecutor:
             cursor = self.conn.cursor(DictCursor)
             
             # Get dashboard spec
-            spec_query = f"""
+            spec_query = """
             SELECT 
                 title,
                 spec
             FROM MCP.VW_DASHBOARDS
-            WHERE dashboard_id = '{dashboard_id}'
+            WHERE dashboard_id = ?
             LIMIT 1
             """
             
-            cursor.execute(spec_query)
+            cursor.execute(spec_query, (dashboard_id,))
             dashboard = cursor.fetchone()
             
             if not dashboard:
@@ -150,27 +236,17 @@ class ScheduleExecutor:
                     
                     # Execute procedure (simplified - would need full param handling)
                     if proc == 'DASH_GET_METRICS':
-                        proc_sql = f"""
-                        CALL MCP.DASH_GET_METRICS(
-                            DATEADD('hour', -24, CURRENT_TIMESTAMP()),
-                            CURRENT_TIMESTAMP(),
-                            NULL
-                        )
-                        """
+                        cursor.execute(METRICS_PROC_SQL)
                     elif proc == 'DASH_GET_TOPN':
-                        proc_sql = f"""
-                        CALL MCP.DASH_GET_TOPN(
-                            DATEADD('hour', -24, CURRENT_TIMESTAMP()),
-                            CURRENT_TIMESTAMP(),
-                            '{params.get('dimension', 'action')}',
-                            NULL,
-                            {params.get('n', 10)}
-                        )
-                        """
+                        try:
+                            bind_params = _topn_params(params)
+                        except (TypeError, ValueError) as e:
+                            logger.warning(f"Skipping panel {panel.get('title', 'Untitled')}: {e}")
+                            continue
+                        cursor.execute(TOPN_PROC_SQL, bind_params)
                     else:
                         continue
                     
-                    cursor.execute(proc_sql)
                     result = cursor.fetchone()
                     results.append({
                         'panel': panel.get('title', 'Untitled'),
@@ -196,7 +272,8 @@ class ScheduleExecutor:
         # 3. Upload to stage
         # 4. Return stage path
         
-        snapshot_id = f"snap_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        # Time-ordered and unique even when several snapshots finish in the same second
+        snapshot_id = f"snap_{time.time_ns()}_{secrets.token_hex(4)}"
         snapshot_path = f"@MCP.DASH_SNAPSHOTS/{snapshot_id}.json"
         
         # For now, just save JSON representation
@@ -278,29 +355,42 @@ class ScheduleExecutor:
         except Exception as e:
             logger.error(f"Error processing schedule {schedule['SCHEDULE_ID']}: {e}")
     
-    def run(self):
-        """Main execution loop"""
-        logger.info("Schedule executor started")
+    async def process_schedules(self, schedules):
+        """Process due schedules concurrently, bounded by warehouse concurrency"""
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_SCHEDULES)
+        
+        async def process(schedule):
+            async with semaphore:
+                await asyncio.to_thread(self.process_schedule, schedule)
         
+        await asyncio.gather(*(process(schedule) for schedule in schedules))
+    
+    async def run_async(self):
+        """Main execution loop"""
         while True:
             try:
                 # Get due schedules
-                schedules = self.get_due_schedules()
+                schedules = await asyncio.to_thread(self.get_due_schedules)
                 
-                # Process each schedule
-                for schedule in schedules:
-                    self.process_schedule(schedule)
+                # Process schedules concurrently
+                await self.process_schedules(schedules)
                 
                 # Wait before next check
-                logger.info("Waiting 60 seconds before next check...")
-                time.sleep(60)
+                logger.info(f"Waiting {POLL_INTERVAL_SECONDS} seconds before next check...")
+                await asyncio.sleep(POLL_INTERVAL_SECONDS)
                 
-            except KeyboardInterrupt:
-                logger.info("Executor stopped by user")
-                break
             except Exception as e:
                 logger.error(f"Executor error: {e}")
-                time.sleep(60)  # Wait before retry
+                await asyncio.sleep(POLL_INTERVAL_SECONDS)  # Wait before retry
+    
+    def run(self):
+        """Run the executor until interrupted"""
+        logger.info("Schedule executor started")
+        
+        try:
+            asyncio.run(self.run_async())
+        except KeyboardInterrupt:
+            logger.info("Executor stopped by user")
         
         if self.conn:
             self.conn.close()
@@ -189,6 +189,94 @@ BEGIN
   );
 END;
 
+-- =====================================================
+-- 4b. DASH_GET_TOPN_TABLE - Top N as a tabular result
+-- Same ranking as DASH_GET_TOPN, returned as rows so clients
+-- fetch Arrow batches instead of decoding a VARIANT array
+-- =====================================================
+-- @statement
+CREATE OR REPLACE FUNCTION MCP.DASH_GET_TOPN_TABLE(PARAMS VARIANT)
+RETURNS TABLE (DIMENSION STRING, COUNT NUMBER)
+AS
+$$
+  SELECT dimension_value, cnt
+  FROM (
+    SELECT 
+      CASE 
+        WHEN COALESCE(PARAMS:dimension::STRING, 'action') = 'action' THEN action
+        WHEN PARAMS:dimension::STRING IN ('actor', 'actor_id') THEN actor_id
+        WHEN PARAMS:dimension::STRING = 'source' THEN source
+        WHEN PARAMS:dimension::STRING = 'object_type' THEN object_type
+        ELSE action
+      END AS dimension_value,
+      COUNT(*) AS cnt
+    FROM ACTIVITY.EVENTS
+    WHERE occurred_at BETWEEN PARAMS:start_ts::TIMESTAMP_TZ AND PARAMS:end_ts::TIMESTAMP_TZ
+      AND (PARAMS:filters:actor::STRING IS NULL OR actor_id = PARAMS:filters:actor::STRING)
+      AND (PARAMS:filters:action::STRING IS NULL OR action = PARAMS:filters:action::STRING)
+      AND (PARAMS:filters:source::STRING IS NULL OR source = PARAMS:filters:source::STRING)
+    GROUP BY dimension_value
+  )
+  QUALIFY ROW_NUMBER() OVER (ORDER BY cnt DESC) <= LEAST(COALESCE(PARAMS:n::NUMBER, 10), 50)
+$$;
+
+-- =====================================================
+-- 4c. DASH_GET_EVENTS_TABLE - Recent events as a tabular result
+-- Same rows as DASH_GET_EVENTS without the VARIANT envelope; event
+-- tables are the largest panel payloads, so they skip JSON entirely
+-- =====================================================
+-- @statement
+CREATE OR REPLACE FUNCTION MCP.DASH_GET_EVENTS_TABLE(PARAMS VARIANT)
+RETURNS TABLE (
+  EVENT_ID STRING,
+  ACTION STRING,
+  ACTOR_ID STRING,
+  OBJECT_TYPE STRING,
+  OBJECT_ID STRING,
+  OCCURRED_AT TIMESTAMP_TZ,
+  SOURCE STRING
+)
+AS
+$$
+  SELECT event_id, action, actor_id, object_type, object_id, occurred_at, source
+  FROM ACTIVITY.EVENTS
+  WHERE occurred_at <= PARAMS:cursor_ts::TIMESTAMP_TZ
+  QUALIFY ROW_NUMBER() OVER (ORDER BY occurred_at DESC) <= LEAST(COALESCE(PARAMS:limit::NUMBER, 100), 5000)
+$$;
+
+-- =====================================================
+-- 4d. DASH_GET_PANELS - Run several panel procedures in one call
+-- REQUESTS is an array of {proc, params}; the result array is
+-- positional so clients map results back to panels by index
+-- =====================================================
+-- @statement
+CREATE OR REPLACE PROCEDURE MCP.DASH_GET_PANELS(REQUESTS VARIANT)
+RETURNS VARIANT
+LANGUAGE SQL
+EXECUTE AS OWNER
+AS
+DECLARE
+  results ARRAY DEFAULT ARRAY_CONSTRUCT();
+  proc STRING;
+  params VARIANT;
+  result VARIANT;
+BEGIN
+  FOR i IN 0 TO ARRAY_SIZE(REQUESTS) - 1 DO
+    proc := REQUESTS[i]:proc::STRING;
+    params := REQUESTS[i]:params;
+    CASE (proc)
+      WHEN 'DASH_GET_SERIES' THEN CALL MCP.DASH_GET_SERIES(:params) INTO :result;
+      WHEN 'DASH_GET_TOPN' THEN CALL MCP.DASH_GET_TOPN(:params) INTO :result;
+      WHEN 'DASH_GET_EVENTS' THEN CALL MCP.DASH_GET_EVENTS(:params) INTO :result;
+      WHEN 'DASH_GET_METRICS' THEN CALL MCP.DASH_GET_METRICS(:params) INTO :result;
+      ELSE result := OBJECT_CONSTRUCT('ok', FALSE, 'error', 'Unknown procedure: ' || COALESCE(proc, 'NULL'));
+    END CASE;
+    results := ARRAY_APPEND(results, result);
+  END FOR;
+  
+  RETURN OBJECT_CONSTRUCT('ok', TRUE, 'data', results);
+END;
+
 -- =====================================================
 -- 5. LOG_CLAUDE_EVENT - Log events from Claude Code
 -- =====================================================
@@ -229,5 +317,14 @@ GRANT USAGE ON PROCEDURE MCP.DASH_GET_EVENTS(VARIANT) TO ROLE CLAUDE_BI_ROLE;
 -- @statement
 GRANT USAGE ON PROCEDURE MCP.DASH_GET_METRICS(VARIANT) TO ROLE CLAUDE_BI_ROLE;
 
+-- @statement
+GRANT USAGE ON FUNCTION MCP.DASH_GET_TOPN_TABLE(VARIANT) TO ROLE CLAUDE_BI_ROLE;
+
+-- @statement
+GRANT USAGE ON FUNCTION MCP.DASH_GET_EVENTS_TABLE(VARIANT) TO ROLE CLAUDE_BI_ROLE;
+
+-- @statement
+GRANT USAGE ON PROCEDURE MCP.DASH_GET_PANELS(VARIANT) TO ROLE CLAUDE_BI_ROLE;
+
 -- @statement
 GRANT USAGE ON PROCEDURE MCP.LOG_CLAUDE_EVENT(VARIANT) TO ROLE CLAUDE_BI_ROLE;
\ No newline at end of file
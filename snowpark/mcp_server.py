@@ -5,18 +5,25 @@ Provides secure, contract-enforced access to Snowflake for query processing
 """
 
 import os
-import json
+import asyncio
+import functools
 import hashlib
+import itertools
+import queue
+import threading
 import time
-from typing import Dict, List, Optional, Any
+from contextlib import contextmanager
+from typing import Any, Dict, FrozenSet, Iterator, List, Optional, Tuple
 from datetime import datetime, timedelta
+from decimal import Decimal
 import uuid
 
 from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field, validator
-import snowflake.connector
-from snowflake.connector import DictCursor
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, field_validator
+import orjson
+import snowflake.connector as sf_connector
 import structlog
 import uvicorn
 from prometheus_client import Counter, Histogram, generate_latest
@@ -29,11 +36,32 @@ query_counter = Counter('mcp_queries_total', 'Total MCP queries executed', ['too
 query_duration = Histogram('mcp_query_duration_seconds', 'Query execution time', ['tool'])
 validation_errors = Counter('mcp_validation_errors_total', 'Validation errors', ['type'])
 
+# Snowflake NUMBER columns with a scale arrive as Decimal, which orjson does not encode
+def _json_default(value: Any) -> Any:
+    """Encode types orjson has no native support for"""
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+# Naive connector timestamps are UTC; emit them with an explicit offset
+JSON_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_NUMPY
+
+def _dumps(content: Any) -> bytes:
+    """Serialize to JSON bytes with the server's orjson options"""
+    return orjson.dumps(content, default=_json_default, option=JSON_OPTIONS)
+
+class MCPJSONResponse(ORJSONResponse):
+    """ORJSONResponse that also handles Decimal and naive UTC datetimes"""
+    
+    def render(self, content: Any) -> bytes:
+        return _dumps(content)
+
 # FastAPI app
 app = FastAPI(
     title="Snowflake MCP Server",
     description="Model Context Protocol server for secure Snowflake access",
-    version="2.0.0"
+    version="2.0.0",
+    default_response_class=MCPJSONResponse
 )
 
 # CORS configuration
@@ -51,15 +79,18 @@ app.add_middleware(
 
 class QueryPlan(BaseModel):
     """Validated query plan structure"""
+    model_config = ConfigDict(extra='forbid', frozen=True, str_strip_whitespace=True)
+    
     source: str
-    dimensions: Optional[List[str]] = []
-    measures: Optional[List[Dict[str, str]]] = []
-    filters: Optional[List[Dict[str, Any]]] = []
+    dimensions: Optional[List[str]] = Field(default_factory=list)
+    measures: Optional[List[Dict[str, str]]] = Field(default_factory=list)
+    filters: Optional[List[Dict[str, Any]]] = Field(default_factory=list)
     grain: Optional[str] = None
     top_n: Optional[int] = Field(None, le=10000)
-    order_by: Optional[List[Dict[str, str]]] = []
+    order_by: Optional[List[Dict[str, str]]] = Field(default_factory=list)
     
-    @validator('top_n')
+    @field_validator('top_n')
+    @classmethod
     def validate_top_n(cls, v):
         if v and v > 10000:
             raise ValueError('Row limit exceeds maximum of 10000')
@@ -67,43 +98,75 @@ class QueryPlan(BaseModel):
 
 class ComposeQueryRequest(BaseModel):
     """Request to compose and execute a query plan"""
+    model_config = ConfigDict(extra='forbid', frozen=True, str_strip_whitespace=True)
+    
     intent_text: str
     source: Optional[str] = None
-    dimensions: Optional[List[str]] = []
-    measures: Optional[List[Dict[str, str]]] = []
-    filters: Optional[List[Dict[str, Any]]] = []
+    dimensions: Optional[List[str]] = Field(default_factory=list)
+    measures: Optional[List[Dict[str, str]]] = Field(default_factory=list)
+    filters: Optional[List[Dict[str, Any]]] = Field(default_factory=list)
     grain: Optional[str] = None
     top_n: Optional[int] = 1000
-    order_by: Optional[List[Dict[str, str]]] = []
+    order_by: Optional[List[Dict[str, str]]] = Field(default_factory=list)
 
 class DashboardSpec(BaseModel):
     """Dashboard creation specification"""
+    model_config = ConfigDict(extra='forbid', frozen=True, str_strip_whitespace=True)
+    
     title: str
     description: Optional[str] = ""
     queries: List[Dict[str, Any]]
     refresh_method: str = "manual"
     schedule: Optional[str] = None
 
+# Reused for internal plan parsing (request -> plan) without rebuilding validators
+_plan_adapter = TypeAdapter(QueryPlan)
+_PLAN_FIELDS = frozenset({'dimensions', 'measures', 'filters', 'grain', 'top_n', 'order_by'})
+
 # ============================================================================
 # Schema Contract Management
 # ============================================================================
 
+CONTRACT_PATH = '/app/contracts/database.contract.json'
+
+# (path, mtime_ns, contract) of the last parsed contract file
+_contract_cache: Optional[tuple] = None
+
+def _load_contract_cached(path: str) -> Dict:
+    """Parse the contract file, reusing the last parse until its mtime changes"""
+    global _contract_cache
+    mtime_ns = os.stat(path).st_mtime_ns
+    if _contract_cache and _contract_cache[:2] == (path, mtime_ns):
+        return _contract_cache[2]
+    
+    with open(path, 'rb') as f:
+        data = orjson.loads(f.read())
+    _contract_cache = (path, mtime_ns, data)
+    return data
+
 class SchemaContract:
     """Manages and validates against the schema contract"""
     
     def __init__(self):
         self.contract = self._load_contract()
-        self.allowed_sources = self._extract_sources()
+        self.database: str = self.contract.get("database", "CLAUDE_BI")
+        # (schema, name, full_name, type) per source, sorted for stable listings
+        self.source_records: Tuple[Tuple[str, str, str, str], ...] = tuple(sorted(self._extract_sources()))
+        self.allowed_sources: FrozenSet[str] = frozenset(
+            f"{schema}.{name}" for schema, name, _, _ in self.source_records
+        )
+        
+        security = self.contract.get("security", {})
+        self.max_rows: int = security.get("max_rows_per_query", 10000)
+        self.forbidden_ops: FrozenSet[str] = frozenset(security.get("forbidden_operations", []))
         
     def _load_contract(self) -> Dict:
         """Load schema contract from Snowflake or file"""
         try:
             # In production, load from Snowflake
             # For now, load from file
-            contract_path = '/app/contracts/database.contract.json'
-            if os.path.exists(contract_path):
-                with open(contract_path, 'r') as f:
-                    return json.load(f)
+            if os.path.exists(CONTRACT_PATH):
+                return _load_contract_cached(CONTRACT_PATH)
         except Exception as e:
             logger.error("Failed to load contract", error=str(e))
         
@@ -128,14 +191,14 @@ class SchemaContract:
             }
         }
     
-    def _extract_sources(self) -> List[str]:
+    def _extract_sources(self) -> List[Tuple[str, str, str, str]]:
         """Extract all allowed sources from contract"""
         sources = []
         for schema_name, schema_def in self.contract.get("schemas", {}).items():
             for table_name in schema_def.get("tables", {}):
-                sources.append(f"{schema_name}.{table_name}")
+                sources.append((schema_name, table_name, f"{self.database}.{schema_name}.{table_name}", "table"))
             for view_name in schema_def.get("views", {}):
-                sources.append(f"{schema_name}.{view_name}")
+                sources.append((schema_name, view_name, f"{self.database}.{schema_name}.{view_name}", "view"))
         return sources
     
     def validate_source(self, source: str) -> bool:
@@ -159,9 +222,8 @@ class SchemaContract:
             errors.append(f"Unknown source: {plan.source}")
         
         # Validate row limit
-        max_rows = self.contract.get("security", {}).get("max_rows_per_query", 10000)
-        if plan.top_n and plan.top_n > max_rows:
-            errors.append(f"Row limit {plan.top_n} exceeds maximum {max_rows}")
+        if plan.top_n and plan.top_n > self.max_rows:
+            errors.append(f"Row limit {plan.top_n} exceeds maximum {self.max_rows}")
         
         return errors
 
@@ -169,87 +231,182 @@ class SchemaContract:
 # SQL Rendering Engine
 # ============================================================================
 
+class _FrozenDict(dict):
+    """Hashable dict for object filter values; still serializes as a JSON object"""
+    __slots__ = ()
+    
+    def __hash__(self):
+        return hash(frozenset(self.items()))
+
+def _freeze(value: Any) -> Any:
+    """Convert list and dict filter values to hashable forms so plans can be cache keys"""
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return _FrozenDict((k, _freeze(v)) for k, v in value.items())
+    return value
+
+def _value_types(value: Any) -> Any:
+    """Type signature of a filter value (keeps True and 1 as distinct keys)"""
+    if isinstance(value, list):
+        return tuple(_value_types(v) for v in value)
+    if isinstance(value, dict):
+        return (dict, tuple(sorted((k, _value_types(v)) for k, v in value.items())))
+    return type(value)
+
+# SQL fragments, parsed once at import; render() only fills in values
+_SELECT_SQL = "SELECT {}".format
+_FROM_SQL = "FROM {}".format
+_WHERE_SQL = "WHERE {}".format
+_GROUP_BY_SQL = "GROUP BY {}".format
+_ORDER_BY_SQL = "ORDER BY {}".format
+_LIMIT_SQL = "LIMIT {}".format
+_MEASURE_SQL = "{fn}({col}) AS {alias}".format
+_IN_SQL = "{} {} ({})".format
+_BETWEEN_SQL = "{} BETWEEN ? AND ?".format
+_COMPARE_SQL = "{} {} ?".format
+_ORDER_SQL = "{col} {direction}".format
+
+@functools.lru_cache(maxsize=64)
+def _placeholders(count: int) -> str:
+    """Comma-separated ? placeholders for an IN / NOT IN list of the given size"""
+    return ",".join("?" * count)
+
+def _measure_alias(fn: str, col: str) -> str:
+    """Output column alias for a measure"""
+    return f"{fn}_{col}".replace('*', 'ALL')
+
+# Plan shapes beyond this many fall back to the generic renderer
+MAX_COMPILED_SHAPES = 64
+
+def _filter_kind(op: str) -> str:
+    """Filter operator category that determines placeholder layout"""
+    return op if op in ('IN', 'NOT IN', 'BETWEEN') else 'CMP'
+
+def _compile_shape(n_dims: int, n_measures: int, filter_kinds: tuple, n_order: int):
+    """Build a render function specialised to one plan shape.
+    
+    Only indices and fixed SQL keywords are written into the generated source;
+    identifiers, operators and values are always passed in as arguments.
+    """
+    select = [f"{{d[{i}]}}" for i in range(n_dims)]
+    select += [f"{{m[{i}][0]}}({{m[{i}][1]}}) AS {{_measure_alias(*m[{i}])}}" for i in range(n_measures)]
+    where, params = [], []
+    for i, kind in enumerate(filter_kinds):
+        if kind in ('IN', 'NOT IN'):
+            where.append(f"{{f[{i}][0]}} {kind} ({{_placeholders(len(f[{i}][2]))}})")
+            params.append(f"*f[{i}][2]")
+        elif kind == 'BETWEEN':
+            where.append(f"{{f[{i}][0]}} BETWEEN ? AND ?")
+            params.append(f"*f[{i}][2][:2]")
+        else:
+            where.append(f"{{f[{i}][0]}} {{f[{i}][1]}} ?")
+            params.append(f"f[{i}][2]")
+    
+    lines = [_SELECT_SQL(', '.join(select) or '*'), "FROM {source}"]
+    if where:
+        lines.append(_WHERE_SQL(' AND '.join(where)))
+    if n_dims and n_measures:
+        lines.append(_GROUP_BY_SQL(', '.join(f"{{d[{i}]}}" for i in range(n_dims))))
+    if n_order:
+        lines.append(_ORDER_BY_SQL(', '.join(f"{{o[{i}][0]}} {{o[{i}][1]}}" for i in range(n_order))))
+    lines.append("LIMIT {top_n or 10000}")
+    
+    params_src = f"({', '.join(params)},)" if params else "()"
+    source = (
+        "def render(source, d, m, f, top_n, o):\n"
+        f"    return f{chr(10).join(lines)!r}, {params_src}\n"
+    )
+    namespace = {'_measure_alias': _measure_alias, '_placeholders': _placeholders}
+    exec(compile(source, f"<plan shape {n_dims}/{n_measures}/{filter_kinds}/{n_order}>", 'exec'), namespace)
+    return namespace['render']
+
 class SqlRenderer:
     """Renders validated SQL from query plans"""
     
     def __init__(self, contract: SchemaContract):
         self.contract = contract
-        self.database = contract.contract.get("database", "CLAUDE_BI")
+        self.database = contract.database
+        # Contract sources (SCHEMA.OBJECT) resolve with one dict lookup
+        self._source_map = {
+            f"{schema}.{name}": full_name for schema, name, full_name, _ in contract.source_records
+        }
+        # Identical plans (dashboard refreshes) skip rendering entirely
+        self._render_cached = functools.lru_cache(maxsize=512)(self._render_key)
+        # Per-shape render functions, compiled on first use
+        self._compiled: Dict[tuple, Any] = {}
     
-    def render(self, plan: QueryPlan) -> str:
-        """Render SQL from a validated query plan"""
-        # Build SELECT clause
-        select_parts = []
-        
-        # Add dimensions
-        if plan.dimensions:
-            select_parts.extend(plan.dimensions)
-        
-        # Add measures
-        if plan.measures:
-            for measure in plan.measures:
-                fn = measure.get('fn', 'COUNT')
-                col = measure.get('column', '*')
-                alias = f"{fn}_{col}".replace('*', 'ALL')
-                select_parts.append(f"{fn}({col}) AS {alias}")
-        
-        # Default to * if no specific columns
-        if not select_parts:
-            select_parts = ['*']
+    def render(self, plan: QueryPlan) -> tuple:
+        """Render (sql, params) from a validated query plan; values use ? placeholders"""
+        return self._render_cached(self._plan_key(plan))
+    
+    @staticmethod
+    def _plan_key(plan: QueryPlan) -> tuple:
+        """Canonical hashable form of the plan fields that affect SQL"""
+        return (
+            plan.source,
+            tuple(plan.dimensions or ()),
+            tuple((m.get('fn', 'COUNT'), m.get('column', '*')) for m in plan.measures or ()),
+            tuple((f['column'], f['operator'], _freeze(f['value']), _value_types(f['value'])) for f in plan.filters or ()),
+            plan.top_n,
+            tuple((o['column'], o.get('direction', 'ASC')) for o in plan.order_by or ())
+        )
+    
+    def _render_key(self, key: tuple) -> tuple:
+        """Render (sql, params) from a canonical plan key"""
+        source, dimensions, measures, filters, top_n, order_by_items = key
+        shape = (len(dimensions), len(measures), tuple(_filter_kind(op) for _, op, _, _ in filters), len(order_by_items))
+        render_shape = self._compiled.get(shape)
+        if render_shape is None:
+            if len(self._compiled) >= MAX_COMPILED_SHAPES:
+                return self._render_generic(key)
+            render_shape = self._compiled[shape] = _compile_shape(*shape)
+        return render_shape(self._qualify_source(source), dimensions, measures, filters, top_n, order_by_items)
+    
+    def _render_generic(self, key: tuple) -> tuple:
+        """Render (sql, params) from a canonical plan key without a compiled shape"""
+        source, dimensions, measures, filters, top_n, order_by_items = key
+        params = []
         
-        # Build FROM clause
-        from_clause = self._qualify_source(plan.source)
+        # Build SELECT clause
+        select_parts = list(dimensions)
+        for fn, col in measures:
+            select_parts.append(_MEASURE_SQL(fn=fn, col=col, alias=_measure_alias(fn, col)))
         
         # Build WHERE clause
         where_conditions = []
-        if plan.filters:
-            for filter_def in plan.filters:
-                col = filter_def['column']
-                op = filter_def['operator']
-                val = filter_def['value']
-                
-                if op == 'IN':
-                    val_str = f"({','.join([self._quote_value(v) for v in val])})"
-                    where_conditions.append(f"{col} {op} {val_str}")
-                elif op == 'BETWEEN':
-                    where_conditions.append(f"{col} BETWEEN {self._quote_value(val[0])} AND {self._quote_value(val[1])}")
-                else:
-                    where_conditions.append(f"{col} {op} {self._quote_value(val)}")
-        
-        # Build GROUP BY clause
-        group_by = ""
-        if plan.dimensions and plan.measures:
-            group_by = f"GROUP BY {', '.join(plan.dimensions)}"
-        
-        # Build ORDER BY clause
-        order_by = ""
-        if plan.order_by:
-            order_parts = []
-            for order in plan.order_by:
-                order_parts.append(f"{order['column']} {order.get('direction', 'ASC')}")
-            order_by = f"ORDER BY {', '.join(order_parts)}"
-        
-        # Build LIMIT clause
-        limit = f"LIMIT {plan.top_n}" if plan.top_n else "LIMIT 10000"
-        
-        # Combine all parts
-        sql = f"SELECT {', '.join(select_parts)}\\nFROM {from_clause}"
-        
+        for col, op, val, _ in filters:
+            if op in ('IN', 'NOT IN'):
+                params.extend(val)
+                where_conditions.append(_IN_SQL(col, op, _placeholders(len(val))))
+            elif op == 'BETWEEN':
+                params.extend(val[:2])
+                where_conditions.append(_BETWEEN_SQL(col))
+            else:
+                params.append(val)
+                where_conditions.append(_COMPARE_SQL(col, op))
+        
+        # Collect clauses and join once
+        parts = [
+            _SELECT_SQL(', '.join(select_parts) or '*'),
+            _FROM_SQL(self._qualify_source(source))
+        ]
         if where_conditions:
-            sql += f"\\nWHERE {' AND '.join(where_conditions)}"
-        
-        if group_by:
-            sql += f"\\n{group_by}"
-        
-        if order_by:
-            sql += f"\\n{order_by}"
-        
-        sql += f"\\n{limit}"
-        
-        return sql
+            parts.append(_WHERE_SQL(' AND '.join(where_conditions)))
+        if dimensions and measures:
+            parts.append(_GROUP_BY_SQL(', '.join(dimensions)))
+        if order_by_items:
+            parts.append(_ORDER_BY_SQL(', '.join(_ORDER_SQL(col=c, direction=d) for c, d in order_by_items)))
+        parts.append(_LIMIT_SQL(top_n or 10000))
+        
+        return "\n".join(parts), tuple(params)
     
     def _qualify_source(self, source: str) -> str:
         """Fully qualify a source name"""
+        qualified = self._source_map.get(source)
+        if qualified:
+            return qualified
+        
         if "." not in source:
             return f"{self.database}.ACTIVITY.{source}"
         
@@ -259,27 +416,34 @@ class SqlRenderer:
         
         return source
     
-    def _quote_value(self, value: Any) -> str:
-        """Properly quote a value for SQL"""
-        if value is None:
-            return "NULL"
-        elif isinstance(value, (int, float)):
-            return str(value)
-        elif isinstance(value, bool):
-            return "TRUE" if value else "FALSE"
-        else:
-            # Escape single quotes
-            escaped = str(value).replace("'", "''")
-            return f"'{escaped}'"
-
 # ============================================================================
 # Snowflake Connection Manager
 # ============================================================================
 
+@functools.lru_cache(maxsize=256)
+def _query_tag_json(tag_items: tuple) -> str:
+    """Encode a query tag once per distinct set of tag values"""
+    return orjson.dumps(dict(tag_items)).decode()
+
+# Sized to the number of queries a worker runs concurrently
+POOL_SIZE = int(os.getenv('MCP_POOL_SIZE', '4'))
+
+# Activity events are queued and written in batches off the request path
+ACTIVITY_QUEUE_SIZE = 10000
+ACTIVITY_BATCH_SIZE = 100
+ACTIVITY_FLUSH_SECONDS = 0.5
+
+# PARSE_JSON is not allowed directly in VALUES, so select over a bound VALUES list
+ACTIVITY_INSERT_SQL = """
+INSERT INTO CLAUDE_BI.ACTIVITY.EVENTS (activity_id, ts, customer, activity, feature_json)
+SELECT column1, column2, column3, column4, PARSE_JSON(column5)
+FROM VALUES (?, ?, ?, ?, ?)
+"""
+
 class SnowflakeManager:
-    """Manages Snowflake connections with local access in container"""
+    """Manages pooled Snowflake connections with local access in container"""
     
-    def __init__(self):
+    def __init__(self, pool_size: int = POOL_SIZE):
         # In Snowpark Container Services, use local connection
         self.connection_params = {
             'account': os.getenv('SNOWFLAKE_ACCOUNT', 'localhost'),
@@ -289,77 +453,174 @@ class SnowflakeManager:
             'database': 'CLAUDE_BI',
             'schema': 'ACTIVITY_CCODE',
             'warehouse': 'MCP_XS_WH',
-            'role': 'MCP_EXECUTOR_ROLE'
+            'role': 'MCP_EXECUTOR_ROLE',
+            'paramstyle': 'qmark'  # server-side binding; identical SQL text reuses plans
         }
-        self.conn = None
+        # LIFO keeps recently used (warm) connections in rotation
+        self._pool_size = pool_size
+        self._pool: queue.LifoQueue = queue.LifoQueue(maxsize=pool_size)
+        self._pool_created = 0
+        self._pool_lock = threading.Lock()
+        
+        self._activity_queue: asyncio.Queue = asyncio.Queue(maxsize=ACTIVITY_QUEUE_SIZE)
+        self._activity_customer = os.getenv('MCP_USER', 'system')
     
-    def connect(self):
-        """Establish connection to Snowflake"""
-        if not self.conn:
-            self.conn = snowflake.connector.connect(**self.connection_params)
-            # Set session parameters
-            self.conn.cursor().execute("ALTER SESSION SET STATEMENT_TIMEOUT_IN_SECONDS = 30")
-            self.conn.cursor().execute("ALTER SESSION SET USE_CACHED_RESULT = TRUE")
+    def _create_connection(self):
+        """Establish a new connection to Snowflake"""
+        conn = sf_connector.connect(**self.connection_params)
+        # Set session parameters in one multi-statement round trip
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "ALTER SESSION SET STATEMENT_TIMEOUT_IN_SECONDS = 30;"
+                "ALTER SESSION SET USE_CACHED_RESULT = TRUE;",
+                num_statements=2
+            )
+        return conn
     
-    def execute_query(self, sql: str, tag: Dict[str, Any] = None) -> Dict:
-        """Execute a query with tagging and monitoring"""
-        self.connect()
-        
-        # Set query tag for tracking
-        if tag:
-            tag_json = json.dumps(tag)
-            self.conn.cursor().execute(f"ALTER SESSION SET QUERY_TAG = '{tag_json}'")
+    @contextmanager
+    def connection(self):
+        """Borrow a pooled connection, opening one lazily up to the pool size"""
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            with self._pool_lock:
+                can_create = self._pool_created < self._pool_size
+                if can_create:
+                    self._pool_created += 1
+            
+            if can_create:
+                try:
+                    conn = self._create_connection()
+                except Exception:
+                    with self._pool_lock:
+                        self._pool_created -= 1
+                    raise
+            else:
+                conn = self._pool.get()
         
+        try:
+            yield conn
+        finally:
+            if conn.is_closed():
+                with self._pool_lock:
+                    self._pool_created -= 1
+            else:
+                self._pool.put(conn)
+    
+    def execute_query(self, sql: str, params: tuple = (), tag: Dict[str, Any] = None) -> Dict:
+        """Execute a query with tagging and monitoring"""
         start_time = time.time()
-        cursor = self.conn.cursor(DictCursor)
         
-        try:
-            cursor.execute(sql)
-            rows = cursor.fetchall()
-            
-            # Get query metadata
-            query_id = cursor.sfqid
-            row_count = cursor.rowcount
-            
-            duration = time.time() - start_time
-            
-            return {
-                'success': True,
-                'rows': rows,
-                'metadata': {
-                    'query_id': query_id,
-                    'row_count': row_count,
-                    'execution_time_ms': int(duration * 1000),
-                    'bytes_scanned': cursor.description
+        # One pooled connection and a single cursor per query
+        with self.connection() as conn, conn.cursor() as cursor:
+            try:
+                # Query tag applies to this statement only; no ALTER SESSION round trip
+                statement_params = {'QUERY_TAG': _query_tag_json(tuple(tag.items()))} if tag else None
+                cursor.execute(sql, params, _statement_params=statement_params)
+                
+                # Fetch as one Arrow table and build row dicts in C rather than
+                # allocating a dict per row in Python (DictCursor)
+                table = cursor.fetch_arrow_all()
+                rows = table.to_pylist() if table is not None else []
+                
+                # Get query metadata
+                query_id = cursor.sfqid
+                row_count = cursor.rowcount
+                
+                duration = time.time() - start_time
+                
+                return {
+                    'success': True,
+                    'rows': rows,
+                    'metadata': {
+                        'query_id': query_id,
+                        'row_count': row_count,
+                        'execution_time_ms': int(duration * 1000),
+                        'bytes_scanned': cursor.description
+                    }
                 }
-            }
-        except Exception as e:
-            logger.error("Query execution failed", sql=sql[:100], error=str(e))
-            raise
-        finally:
-            cursor.close()
+            except Exception as e:
+                logger.error("Query execution failed", sql=sql[:100], error=str(e))
+                raise
+    
+    def stream_query(self, sql: str, params: tuple = (), tag: Dict[str, Any] = None) -> Iterator:
+        """Execute a query and yield its result as Arrow record batches
+        
+        The connection stays checked out until the generator is exhausted or closed.
+        """
+        with self.connection() as conn, conn.cursor() as cursor:
+            try:
+                statement_params = {'QUERY_TAG': _query_tag_json(tuple(tag.items()))} if tag else None
+                cursor.execute(sql, params, _statement_params=statement_params)
+                for table in cursor.fetch_arrow_batches():
+                    yield from table.to_batches()
+            except Exception as e:
+                logger.error("Query stream failed", sql=sql[:100], error=str(e))
+                raise
     
     def log_activity(self, activity: str, details: Dict):
-        """Log activity to Snowflake Activity Schema"""
-        event = {
-            'activity_id': f"act_{uuid.uuid4().hex[:12]}",
-            'ts': datetime.utcnow().isoformat(),
-            'customer': os.getenv('MCP_USER', 'system'),
-            'activity': f"ccode.{activity}",
-            'feature_json': json.dumps(details)
-        }
+        """Queue an activity event; the background writer inserts it in batches
         
-        sql = f"""
-        INSERT INTO CLAUDE_BI.ACTIVITY.EVENTS (activity_id, ts, customer, activity, feature_json)
-        VALUES ('{event['activity_id']}', '{event['ts']}', '{event['customer']}', 
-                '{event['activity']}', PARSE_JSON('{event['feature_json']}'))
+        Never blocks, but must be called from the event loop thread (asyncio.Queue).
         """
+        row = (
+            f"act_{uuid.uuid4().hex[:12]}",
+            datetime.utcnow().isoformat(),
+            self._activity_customer,
+            f"ccode.{activity}",
+            _dumps(details).decode()
+        )
         
         try:
-            self.connect()
-            self.conn.cursor().execute(sql)
+            self._activity_queue.put_nowait(row)
+        except asyncio.QueueFull:
+            logger.error("Activity queue full, dropping event", activity=activity)
+    
+    def _write_activity(self, rows: List[tuple]):
+        """Insert a batch of activity rows in one round trip"""
+        try:
+            with self.connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.executemany(ACTIVITY_INSERT_SQL, rows)
         except Exception as e:
-            logger.error("Failed to log activity", error=str(e))
+            logger.error("Failed to log activity", error=str(e), count=len(rows))
+    
+    async def _next_activity_batch(self) -> List[tuple]:
+        """Wait for queued rows, up to the batch size or flush interval"""
+        loop = asyncio.get_running_loop()
+        rows = [await self._activity_queue.get()]
+        deadline = loop.time() + ACTIVITY_FLUSH_SECONDS
+        
+        try:
+            while len(rows) < ACTIVITY_BATCH_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    rows.append(await asyncio.wait_for(self._activity_queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+        except asyncio.CancelledError:
+            # Hand the partial batch back for the shutdown flush
+            for row in rows:
+                self._activity_queue.put_nowait(row)
+            raise
+        
+        return rows
+    
+    async def run_activity_writer(self):
+        """Drain the activity queue in batches"""
+        while True:
+            rows = await self._next_activity_batch()
+            await asyncio.to_thread(self._write_activity, rows)
+    
+    async def flush_activity(self):
+        """Write any rows still queued (used at shutdown)"""
+        rows = []
+        while not self._activity_queue.empty():
+            rows.append(self._activity_queue.get_nowait())
+        if rows:
+            await asyncio.to_thread(self._write_activity, rows)
 
 # ============================================================================
 # Global instances
@@ -369,10 +630,59 @@ contract = SchemaContract()
 sql_renderer = SqlRenderer(contract)
 snowflake = SnowflakeManager()
 
+# ============================================================================
+# Plan response caching
+# ============================================================================
+
+def _canonical_plan(plan: QueryPlan) -> bytes:
+    """Serialize a plan with sorted keys so equal plans hash equally"""
+    return orjson.dumps(plan.model_dump(), option=orjson.OPT_SORT_KEYS)
+
+def _plan_etag(canonical_plan: bytes) -> str:
+    """Strong ETag for a plan, namespaced by contract version"""
+    digest = hashlib.blake2b(canonical_plan, digest_size=16)
+    digest.update(contract.contract.get("version", "2.0.0").encode())
+    return f'"{digest.hexdigest()}"'
+
+@functools.lru_cache(maxsize=1024)
+def _validate_plan_response(canonical_plan: bytes) -> tuple:
+    """Validate and render a canonical plan, returning (valid, JSON body)"""
+    plan = _plan_adapter.validate_json(canonical_plan)
+    errors = contract.validate_plan(plan)
+    
+    if errors:
+        return False, orjson.dumps({"valid": False, "errors": errors})
+    
+    # Render SQL for validation
+    sql, params = sql_renderer.render(plan)
+    
+    return True, orjson.dumps({
+        "valid": True,
+        "plan": plan.model_dump(),
+        "sql": sql,
+        "params": params,
+        "message": "Plan is valid and ready for execution"
+    })
+
 # ============================================================================
 # API Endpoints
 # ============================================================================
 
+@app.on_event("startup")
+async def start_activity_writer():
+    """Start the background activity writer"""
+    app.state.activity_writer = asyncio.create_task(snowflake.run_activity_writer())
+
+@app.on_event("shutdown")
+async def stop_activity_writer():
+    """Stop the activity writer and flush what is still queued"""
+    app.state.activity_writer.cancel()
+    try:
+        await app.state.activity_writer
+    except asyncio.CancelledError:
+        pass
+    await snowflake.flush_activity()
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint for container monitoring"""
@@ -383,33 +693,36 @@ async def metrics():
     """Prometheus metrics endpoint"""
     return Response(content=generate_latest(), media_type="text/plain")
 
+# Tool catalog is static; build the model schemas once at import
+_TOOLS_RESPONSE = {
+    "tools": [
+        {
+            "name": "compose_query_plan",
+            "description": "Compose and execute a validated query plan",
+            "input_schema": ComposeQueryRequest.model_json_schema()
+        },
+        {
+            "name": "create_dashboard",
+            "description": "Create a Snowflake Streamlit dashboard",
+            "input_schema": DashboardSpec.model_json_schema()
+        },
+        {
+            "name": "list_sources",
+            "description": "List available data sources",
+            "input_schema": {}
+        },
+        {
+            "name": "validate_plan",
+            "description": "Validate a query plan without execution",
+            "input_schema": QueryPlan.model_json_schema()
+        }
+    ]
+}
+
 @app.get("/tools")
 async def list_tools():
     """List available MCP tools"""
-    return {
-        "tools": [
-            {
-                "name": "compose_query_plan",
-                "description": "Compose and execute a validated query plan",
-                "input_schema": ComposeQueryRequest.model_json_schema()
-            },
-            {
-                "name": "create_dashboard",
-                "description": "Create a Snowflake Streamlit dashboard",
-                "input_schema": DashboardSpec.model_json_schema()
-            },
-            {
-                "name": "list_sources",
-                "description": "List available data sources",
-                "input_schema": {}
-            },
-            {
-                "name": "validate_plan",
-                "description": "Validate a query plan without execution",
-                "input_schema": QueryPlan.model_json_schema()
-            }
-        ]
-    }
+    return _TOOLS_RESPONSE
 
 @app.post("/tools/compose_query_plan")
 async def compose_query_plan(request: ComposeQueryRequest):
@@ -417,15 +730,10 @@ async def compose_query_plan(request: ComposeQueryRequest):
     with query_duration.labels(tool='compose_query_plan').time():
         try:
             # Build query plan
-            plan = QueryPlan(
-                source=request.source or "VW_ACTIVITY_SUMMARY",
-                dimensions=request.dimensions,
-                measures=request.measures,
-                filters=request.filters,
-                grain=request.grain,
-                top_n=request.top_n,
-                order_by=request.order_by
-            )
+            plan = _plan_adapter.validate_python({
+                **request.model_dump(include=_PLAN_FIELDS),
+                'source': request.source or "VW_ACTIVITY_SUMMARY"
+            })
             
             # Validate plan
             errors = contract.validate_plan(plan)
@@ -435,10 +743,12 @@ async def compose_query_plan(request: ComposeQueryRequest):
                 return {"success": False, "errors": errors}
             
             # Render SQL
-            sql = sql_renderer.render(plan)
+            sql, params = sql_renderer.render(plan)
             
             # Execute query
-            result = snowflake.execute_query(sql, tag={
+            # Blocking connector I/O runs on a worker thread, keeping the event loop
+            # free for /health and /metrics
+            result = await asyncio.to_thread(snowflake.execute_query, sql, params, tag={
                 'mcp_tool': 'compose_query_plan',
                 'mcp_user': os.getenv('MCP_USER', 'unknown'),
                 'intent': request.intent_text[:100]
@@ -457,6 +767,7 @@ async def compose_query_plan(request: ComposeQueryRequest):
                 "success": True,
                 "plan": plan.model_dump(),
                 "sql": sql,
+                "params": params,
                 "results": result['rows'],
                 "metadata": result['metadata']
             }
@@ -466,53 +777,110 @@ async def compose_query_plan(request: ComposeQueryRequest):
             logger.error("Query plan execution failed", error=str(e))
             raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/tools/validate_plan")
-async def validate_plan(plan: QueryPlan):
-    """Validate a query plan without executing"""
+def _ndjson_batches(header: Dict, first_batch: Any, batches: Iterator) -> Iterator[bytes]:
+    """Serialize a header line followed by one JSON line per result row"""
+    yield _dumps(header) + b"\n"
+    if first_batch is None:
+        return
+    for batch in itertools.chain((first_batch,), batches):
+        yield b"".join(_dumps(row) + b"\n" for row in batch.to_pylist())
+
+@app.post("/tools/compose_query_plan/stream")
+async def compose_query_plan_stream(request: ComposeQueryRequest):
+    """Compose and execute a query plan, streaming rows as NDJSON
+    
+    The first line carries the plan, SQL and params; each following line is one row.
+    Memory stays bounded by the connector's batch size rather than the result size.
+    """
     try:
-        errors = contract.validate_plan(plan)
+        plan = _plan_adapter.validate_python({
+            **request.model_dump(include=_PLAN_FIELDS),
+            'source': request.source or "VW_ACTIVITY_SUMMARY"
+        })
         
+        errors = contract.validate_plan(plan)
         if errors:
             validation_errors.labels(type='plan').inc()
-            return {"valid": False, "errors": errors}
+            query_counter.labels(tool='compose_query_plan_stream', status='invalid').inc()
+            return {"success": False, "errors": errors}
         
-        # Render SQL for validation
-        sql = sql_renderer.render(plan)
+        sql, params = sql_renderer.render(plan)
         
-        return {
-            "valid": True,
-            "plan": plan.model_dump(),
-            "sql": sql,
-            "message": "Plan is valid and ready for execution"
-        }
+        batches = snowflake.stream_query(sql, params, tag={
+            'mcp_tool': 'compose_query_plan_stream',
+            'mcp_user': os.getenv('MCP_USER', 'unknown'),
+            'intent': request.intent_text[:100]
+        })
+        # Execute and fetch the first batch before responding so failures
+        # still surface as an HTTP error
+        first_batch = await asyncio.to_thread(next, batches, None)
+        
+        snowflake.log_activity('query_executed', {
+            'tool': 'compose_query_plan_stream',
+            'plan': plan.model_dump()
+        })
+        
+        query_counter.labels(tool='compose_query_plan_stream', status='success').inc()
+        
+        header = {"success": True, "plan": plan.model_dump(), "sql": sql, "params": params}
+        return StreamingResponse(
+            _ndjson_batches(header, first_batch, batches),
+            media_type="application/x-ndjson"
+        )
+        
+    except Exception as e:
+        query_counter.labels(tool='compose_query_plan_stream', status='error').inc()
+        logger.error("Query plan stream failed", error=str(e))
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/tools/validate_plan")
+async def validate_plan(plan: QueryPlan, request: Request):
+    """Validate a query plan without executing"""
+    try:
+        canonical_plan = _canonical_plan(plan)
+        etag = _plan_etag(canonical_plan)
+        
+        # Client already holds this validation result
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+        
+        valid, body = _validate_plan_response(canonical_plan)
+        if not valid:
+            validation_errors.labels(type='plan').inc()
+        
+        return Response(content=body, media_type="application/json", headers={"ETag": etag})
         
     except Exception as e:
         logger.error("Plan validation failed", error=str(e))
         raise HTTPException(status_code=500, detail=str(e))
 
+# Sample columns by object name until list_sources reads INFORMATION_SCHEMA
+_SAMPLE_COLUMNS = {
+    "VW_ACTIVITY_SUMMARY": ["TOTAL_EVENTS", "UNIQUE_CUSTOMERS", "UNIQUE_ACTIVITIES", "LAST_EVENT"],
+    "VW_ACTIVITY_COUNTS_24H": ["HOUR", "ACTIVITY", "EVENT_COUNT", "UNIQUE_CUSTOMERS"],
+    "EVENTS": ["ACTIVITY_ID", "TS", "CUSTOMER", "ACTIVITY", "FEATURE_JSON"]
+}
+
 @app.get("/tools/list_sources")
 async def list_sources(include_columns: bool = False):
     """List all available data sources"""
     try:
         sources = []
         
-        for source in contract.allowed_sources:
+        for schema, name, full_name, source_type in contract.source_records:
             source_info = {
-                "name": source.split(".")[-1],
-                "schema": source.split(".")[0],
-                "type": "view" if "VW_" in source else "table",
-                "full_name": f"{contract.database}.{source}"
+                "name": name,
+                "schema": schema,
+                "type": source_type,
+                "full_name": full_name
             }
             
             if include_columns:
                 # In production, query INFORMATION_SCHEMA
                 # For now, return sample columns
-                if "VW_ACTIVITY_SUMMARY" in source:
-                    source_info["columns"] = ["TOTAL_EVENTS", "UNIQUE_CUSTOMERS", "UNIQUE_ACTIVITIES", "LAST_EVENT"]
-                elif "VW_ACTIVITY_COUNTS_24H" in source:
-                    source_info["columns"] = ["HOUR", "ACTIVITY", "EVENT_COUNT", "UNIQUE_CUSTOMERS"]
-                elif "EVENTS" in source:
-                    source_info["columns"] = ["ACTIVITY_ID", "TS", "CUSTOMER", "ACTIVITY", "FEATURE_JSON"]
+                columns = _SAMPLE_COLUMNS.get(name)
+                if columns:
+                    source_info["columns"] = columns
             
             sources.append(source_info)
         
@@ -560,49 +928,57 @@ async def create_dashboard(spec: DashboardSpec):
         logger.error("Dashboard creation failed", error=str(e))
         raise HTTPException(status_code=500, detail=str(e))
 
-def generate_streamlit_code(dashboard_id: str, spec: DashboardSpec) -> str:
-    """Generate Streamlit dashboard code"""
-    code = f'''
+_STREAMLIT_HEADER = '''
 import streamlit as st
 import snowflake.connector
 import pandas as pd
 import plotly.express as px
 
 st.set_page_config(
-    page_title="{spec.title}",
+    page_title="{title}",
     page_icon="📊",
     layout="wide"
 )
 
-st.title("{spec.title}")
-st.markdown("{spec.description}")
+st.title("{title}")
+st.markdown("{description}")
 
 # Connection is automatic in Snowpark
 conn = snowflake.connector.connect()
 
 '''
-    
-    for i, query_spec in enumerate(spec.queries):
-        code += f'''
-# Query {i+1}: {query_spec.get('name', f'Query {i+1}')}
+
+_QUERY_BLOCK = '''
+# Query {n}: {name}
 with st.container():
-    st.subheader("{query_spec.get('name', f'Query {i+1}')}")
+    st.subheader("{name}")
     
     df_{i} = pd.read_sql("""
-    {query_spec.get('sql', 'SELECT 1')}
+    {sql}
     """, conn)
     
-    if "{query_spec.get('chart_type', 'table')}" == "line":
+    if "{chart_type}" == "line":
         fig = px.line(df_{i}, x=df_{i}.columns[0], y=df_{i}.columns[1])
         st.plotly_chart(fig, use_container_width=True)
-    elif "{query_spec.get('chart_type', 'table')}" == "bar":
+    elif "{chart_type}" == "bar":
         fig = px.bar(df_{i}, x=df_{i}.columns[0], y=df_{i}.columns[1])
         st.plotly_chart(fig, use_container_width=True)
     else:
         st.dataframe(df_{i}, use_container_width=True)
 '''
-    
-    return code
+
+def generate_streamlit_code(dashboard_id: str, spec: DashboardSpec) -> str:
+    """Generate Streamlit dashboard code"""
+    return _STREAMLIT_HEADER.format(title=spec.title, description=spec.description) + "".join(
+        _QUERY_BLOCK.format(
+            i=i,
+            n=i + 1,
+            name=query_spec.get('name', f'Query {i+1}'),
+            sql=query_spec.get('sql', 'SELECT 1'),
+            chart_type=query_spec.get('chart_type', 'table')
+        )
+        for i, query_spec in enumerate(spec.queries)
+    )
 
 # ============================================================================
 # Main entry point
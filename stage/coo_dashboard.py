@@ -10,7 +10,11 @@ import json
 from datetime import datetime, timedelta, timezone
 import pandas as pd
 import hashlib
+import itertools
+import queue
 import re
+import threading
+import time
 
 # Get Snowpark session
 session = get_active_session()
@@ -23,146 +27,168 @@ st.set_page_config(
 )
 
 # Initialize session state
-if 'current_plan' not in st.session_state:
-    st.session_state.current_plan = None
-if 'time_range' not in st.session_state:
-    st.session_state.time_range = '24h'
-if 'interval' not in st.session_state:
-    st.session_state.interval = 'hour'
-if 'last_dashboard' not in st.session_state:
-    st.session_state.last_dashboard = None
-if 'favorites' not in st.session_state:
-    st.session_state.favorites = []
-if 'claude_status' not in st.session_state:
-    st.session_state.claude_status = 'Listening'
-if 'claude_mode' not in st.session_state:
-    st.session_state.claude_mode = 'Auto'  # Auto or Approve
-if 'show_agent_console' not in st.session_state:
-    st.session_state.show_agent_console = False
-if 'last_claude_action' not in st.session_state:
-    st.session_state.last_claude_action = None
+SESSION_DEFAULTS = {
+    'current_plan': None,
+    'time_range': '24h',
+    'interval': 'hour',
+    'last_dashboard': None,
+    'favorites': [],
+    'claude_status': 'Listening',
+    'claude_mode': 'Auto',  # Auto or Approve
+    'show_agent_console': False,
+    'last_claude_action': None,
+    'plan_dirty': False,
+    'last_data': None,
+    'plan_params_json': None
+}
+for key, default in SESSION_DEFAULTS.items():
+    st.session_state.setdefault(key, default)
 
 # Helper to get ISO timestamps
-def get_iso_timestamp(delta=None):
+def get_iso_timestamp(delta=None, now=None):
     """Get ISO timestamp with optional delta"""
-    now = datetime.now(timezone.utc)
+    if now is None:
+        now = datetime.now(timezone.utc)
     if delta:
         now = now - delta
     return now.isoformat()
 
-def get_start_of_day():
+def _canon(obj):
+    """Canonical JSON bytes, shared by binds and plan hashes"""
+    return json.dumps(obj, sort_keys=True, separators=(",", ":"), default=str).encode()
+
+def get_start_of_day(now=None):
     """Get ISO timestamp for start of today (UTC)"""
-    now = datetime.now(timezone.utc)
+    if now is None:
+        now = datetime.now(timezone.utc)
     start = now.replace(hour=0, minute=0, second=0, microsecond=0)
     return start.isoformat()
 
 # Preset card configurations with ISO timestamps
-PRESET_CARDS = {
-    "activity_by_user": {
-        "title": "Activity by User",
-        "subtitle": "Last 7 days",
-        "icon": "👥",
-        "color": "#1f77b4",
-        "plan": {
-            "plan_version": "1.0",
-            "proc": "DASH_GET_TOPN",
-            "params": {
-                "start_ts": get_iso_timestamp(timedelta(days=7)),
-                "end_ts": get_iso_timestamp(),
-                "dimension": "actor",
-                "n": 25,
-                "limit": 1000,
-                "filters": {}
-            },
-            "panels": [{"type": "bar", "title": "Activity by User"}]
-        }
-    },
-    "top_actions_today": {
-        "title": "Top Actions",
-        "subtitle": "Today",
-        "icon": "🎯",
-        "color": "#ff7f0e",
-        "plan": {
-            "plan_version": "1.0",
-            "proc": "DASH_GET_TOPN",
-            "params": {
-                "start_ts": get_start_of_day(),
-                "end_ts": get_iso_timestamp(),
-                "dimension": "action",
-                "n": 10,
-                "limit": 1000,
-                "filters": {}
-            },
-            "panels": [{"type": "bar", "title": "Top Actions Today"}]
-        }
-    },
-    "unique_actors": {
-        "title": "Unique Actors",
-        "subtitle": "Last 30 days",
-        "icon": "🌟",
-        "color": "#2ca02c",
-        "plan": {
-            "plan_version": "1.0",
-            "proc": "DASH_GET_METRICS",
-            "params": {
-                "start_ts": get_iso_timestamp(timedelta(days=30)),
-                "end_ts": get_iso_timestamp(),
-                "filters": {}
-            },
-            "panels": [{"type": "metric", "title": "30-Day Overview"}]
-        }
-    },
-    "events_by_source": {
-        "title": "Events by Source",
-        "subtitle": "Last 24 hours",
-        "icon": "📊",
-        "color": "#d62728",
-        "plan": {
-            "plan_version": "1.0",
-            "proc": "DASH_GET_TOPN",
-            "params": {
-                "start_ts": get_iso_timestamp(timedelta(hours=24)),
-                "end_ts": get_iso_timestamp(),
-                "dimension": "source",
-                "n": 10,
-                "limit": 1000,
-                "filters": {}
-            },
-            "panels": [{"type": "bar", "title": "Events by Source"}]
-        }
-    },
-    "hourly_activity": {
-        "title": "Activity Timeline",
-        "subtitle": "Last 24 hours",
-        "icon": "📈",
-        "color": "#9467bd",
-        "plan": {
-            "plan_version": "1.0",
-            "proc": "DASH_GET_SERIES",
-            "params": {
-                "start_ts": get_iso_timestamp(timedelta(hours=24)),
-                "end_ts": get_iso_timestamp(),
-                "interval": "hour",
-                "filters": {}
-            },
-            "panels": [{"type": "line", "title": "Hourly Activity"}]
-        }
-    },
-    "live_stream": {
-        "title": "Live Activity",
-        "subtitle": "Real-time",
-        "icon": "🔴",
-        "color": "#8c564b",
-        "plan": {
-            "plan_version": "1.0",
-            "proc": "DASH_GET_EVENTS",
-            "params": {
-                "cursor_ts": get_iso_timestamp(timedelta(minutes=5)),
-                "limit": 50
-            },
-            "panels": [{"type": "table", "title": "Recent Events"}]
+# Cached so reruns reuse the dict; timestamps refresh once a minute
+@st.cache_data(ttl=60, show_spinner=False)
+def _build_preset_cards():
+    """Build preset card configurations anchored to the current time"""
+    now = datetime.now(timezone.utc)
+    cards = {
+        "activity_by_user": {
+            "title": "Activity by User",
+            "subtitle": "Last 7 days",
+            "icon": "👥",
+            "color": "#1f77b4",
+            "plan": {
+                "plan_version": "1.0",
+                "proc": "DASH_GET_TOPN",
+                "params": {
+                    "start_ts": get_iso_timestamp(timedelta(days=7), now),
+                    "end_ts": get_iso_timestamp(now=now),
+                    "dimension": "actor",
+                    "n": 25,
+                    "limit": 1000,
+                    "filters": {}
+                },
+                "panels": [{"type": "bar", "title": "Activity by User"}]
+            }
+        },
+        "top_actions_today": {
+            "title": "Top Actions",
+            "subtitle": "Today",
+            "icon": "🎯",
+            "color": "#ff7f0e",
+            "plan": {
+                "plan_version": "1.0",
+                "proc": "DASH_GET_TOPN",
+                "params": {
+                    "start_ts": get_start_of_day(now),
+                    "end_ts": get_iso_timestamp(now=now),
+                    "dimension": "action",
+                    "n": 10,
+                    "limit": 1000,
+                    "filters": {}
+                },
+                "panels": [{"type": "bar", "title": "Top Actions Today"}]
+            }
+        },
+        "unique_actors": {
+            "title": "Unique Actors",
+            "subtitle": "Last 30 days",
+            "icon": "🌟",
+            "color": "#2ca02c",
+            "plan": {
+                "plan_version": "1.0",
+                "proc": "DASH_GET_METRICS",
+                "params": {
+                    "start_ts": get_iso_timestamp(timedelta(days=30), now),
+                    "end_ts": get_iso_timestamp(now=now),
+                    "filters": {}
+                },
+                "panels": [{"type": "metric", "title": "30-Day Overview"}]
+            }
+        },
+        "events_by_source": {
+            "title": "Events by Source",
+            "subtitle": "Last 24 hours",
+            "icon": "📊",
+            "color": "#d62728",
+            "plan": {
+                "plan_version": "1.0",
+                "proc": "DASH_GET_TOPN",
+                "params": {
+                    "start_ts": get_iso_timestamp(timedelta(hours=24), now),
+                    "end_ts": get_iso_timestamp(now=now),
+                    "dimension": "source",
+                    "n": 10,
+                    "limit": 1000,
+                    "filters": {}
+                },
+                "panels": [{"type": "bar", "title": "Events by Source"}]
+            }
+        },
+        "hourly_activity": {
+            "title": "Activity Timeline",
+            "subtitle": "Last 24 hours",
+            "icon": "📈",
+            "color": "#9467bd",
+            "plan": {
+                "plan_version": "1.0",
+                "proc": "DASH_GET_SERIES",
+                "params": {
+                    "start_ts": get_iso_timestamp(timedelta(hours=24), now),
+                    "end_ts": get_iso_timestamp(now=now),
+                    "interval": "hour",
+                    "filters": {}
+                },
+                "panels": [{"type": "line", "title": "Hourly Activity"}]
+            }
+        },
+        "live_stream": {
+            "title": "Live Activity",
+            "subtitle": "Real-time",
+            "icon": "🔴",
+            "color": "#8c564b",
+            "plan": {
+                "plan_version": "1.0",
+                "proc": "DASH_GET_EVENTS",
+                "params": {
+                    "cursor_ts": get_iso_timestamp(timedelta(minutes=5), now),
+                    "limit": 50
+                },
+                "panels": [{"type": "table", "title": "Recent Events"}]
+            }
         }
     }
+    # Serialize each preset's params once per refresh, ready for the plan bind
+    for card in cards.values():
+        card['params_json'] = _canon(card['plan']['params']).decode()
+    return cards
+
+PRESET_CARDS = _build_preset_cards()
+
+# Procs with a table-function twin; their rows come back as an Arrow-backed
+# DataFrame instead of a VARIANT array decoded in Python
+TABLE_PLAN_SQL = {
+    "DASH_GET_TOPN": "SELECT * FROM TABLE(MCP.DASH_GET_TOPN_TABLE(PARSE_JSON(?))) ORDER BY COUNT DESC",
+    "DASH_GET_EVENTS": "SELECT * FROM TABLE(MCP.DASH_GET_EVENTS_TABLE(PARSE_JSON(?))) ORDER BY OCCURRED_AT DESC"
 }
 
 def run_plan(session, plan, query_tag):
@@ -177,13 +203,14 @@ def run_plan(session, plan, query_tag):
     params = plan.get("params", {})
     
     # Ensure timestamps are ISO format (not SQL expressions)
+    now = datetime.now(timezone.utc)
     if "start_ts" in params and "DATEADD" in str(params["start_ts"]):
         # Default to last 24 hours if SQL expression detected
-        params["start_ts"] = (datetime.now(timezone.utc) - timedelta(hours=24)).isoformat()
+        params["start_ts"] = (now - timedelta(hours=24)).isoformat()
     if "end_ts" in params and "CURRENT" in str(params["end_ts"]):
-        params["end_ts"] = datetime.now(timezone.utc).isoformat()
+        params["end_ts"] = now.isoformat()
     if "cursor_ts" in params and "DATEADD" in str(params["cursor_ts"]):
-        params["cursor_ts"] = (datetime.now(timezone.utc) - timedelta(minutes=5)).isoformat()
+        params["cursor_ts"] = (now - timedelta(minutes=5)).isoformat()
     
     # Clamp limits for safety
     if "limit" in params:
@@ -197,20 +224,36 @@ def run_plan(session, plan, query_tag):
         if params["interval"] not in valid_intervals:
             params["interval"] = "hour"  # Default to hour
     
-    # Set query tag with Claude attribution
-    session.sql(f"ALTER SESSION SET QUERY_TAG = '{query_tag}'").collect()
+    # Bind the JSON parameter; the Claude attribution query tag rides on the
+    # statement itself, saving an ALTER SESSION round trip
+    payload = _canon(params).decode()
+    statement_params = {"QUERY_TAG": query_tag}
+    
+    table_sql = TABLE_PLAN_SQL.get(proc)
+    if table_sql:
+        return session.sql(table_sql).bind(params=[payload]).to_pandas(
+            statement_params=statement_params
+        )
     
     # THE CRITICAL FIX: Use single VARIANT parameter with PARSE_JSON(?)
     stmt = f"CALL MCP.{proc}(PARSE_JSON(?))"
+    rows = session.sql(stmt).bind(params=[payload]).collect(
+        statement_params=statement_params
+    )
     
-    # Bind the JSON parameter
-    payload = json.dumps(params)
-    result_df = session.sql(stmt).bind(params=[payload]).to_pandas()
-    
-    return result_df
+    # Procedures return a single VARIANT cell; skip the DataFrame round trip
+    return rows[0][0] if rows else None
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _cached_run_plan(proc, params_json, query_tag):
+    """Run a plan once per (proc, params) within the TTL; reruns reuse the result"""
+    return run_plan(session, {"proc": proc, "params": json.loads(params_json)}, query_tag)
 
-def execute_plan(plan):
-    """Execute a dashboard plan and return results"""
+def execute_plan(plan, params_json=None):
+    """Execute a dashboard plan and return results
+    
+    params_json is the plan's pre-serialized canonical params, when already known.
+    """
     try:
         st.session_state.claude_status = 'Calling'
         proc = plan['proc']
@@ -223,13 +266,21 @@ def execute_plan(plan):
         
         # Use the correct execution method
         query_tag = f'dash-ui|agent:claude|proc:{proc}'
-        result_df = run_plan(session, plan, query_tag)
+        if params_json is None:
+            params_json = _canon(plan.get('params', {})).decode()
+        result = _cached_run_plan(proc, params_json, query_tag)
+        
+        # Table-function results are already tabular
+        if isinstance(result, pd.DataFrame):
+            st.session_state.claude_status = 'Rendered'
+            log_claude_event('render_completed', {
+                'rows': len(result),
+                'proc': proc
+            })
+            return result
         
         # Parse the result (procedures return VARIANT)
-        if not result_df.empty:
-            result_col = result_df.columns[0]
-            result = result_df.iloc[0][result_col]
-            
+        if result is not None:
             # Parse JSON if string
             if isinstance(result, str):
                 result = json.loads(result)
@@ -279,8 +330,10 @@ def render_preset_card(key, config):
         ):
             # Immediate execution - no confirm dialog
             st.session_state.current_plan = config['plan']
+            st.session_state.plan_params_json = config['params_json']
+            st.session_state.plan_dirty = True
             st.session_state.view_mode = 'canvas'
-            st.experimental_rerun()
+            st.rerun()
 
 def render_claude_status():
     """Render Claude Code status chip"""
@@ -294,6 +347,39 @@ def render_claude_status():
     }
     return f"{status_icons.get(status, '⚪')} Claude: {status}"
 
+@st.cache_data(ttl=15, show_spinner=False)
+def _recent_dashboards():
+    """Most recent dashboards; cleared by save_dashboard so new ones show at once"""
+    recent_query = """
+    SELECT 
+        dashboard_id,
+        title,
+        created_at,
+        created_by
+    FROM MCP.VW_DASHBOARDS
+    ORDER BY created_at DESC
+    LIMIT 3
+    """
+    return session.sql(recent_query).to_pandas().to_dict("records")
+
+# Global control options; built once rather than on every home render
+TIME_OPTIONS = {
+    '6h': 'Last 6 hours',
+    '24h': 'Last 24 hours',
+    '7d': 'Last 7 days',
+    '30d': 'Last 30 days'
+}
+_TIME_KEYS = list(TIME_OPTIONS)
+
+INTERVAL_OPTIONS = {
+    '15 minute': '15 minutes',
+    'hour': 'Hourly',
+    'day': 'Daily'
+}
+_INTERVAL_KEYS = list(INTERVAL_OPTIONS)
+
+MODE_OPTIONS = ['Auto', 'Approve']
+
 def render_home():
     """Render the home screen with preset cards"""
     # Claude Code branding
@@ -307,40 +393,28 @@ def render_home():
     # Top bar with global controls
     col1, col2, col3, col4, col5 = st.columns([2, 2, 2, 2, 2])
     with col1:
-        time_options = {
-            '6h': 'Last 6 hours',
-            '24h': 'Last 24 hours',
-            '7d': 'Last 7 days',
-            '30d': 'Last 30 days'
-        }
         st.session_state.time_range = st.selectbox(
             "Time Range",
-            options=list(time_options.keys()),
-            format_func=lambda x: time_options[x],
-            index=list(time_options.keys()).index(st.session_state.time_range),
+            options=_TIME_KEYS,
+            format_func=TIME_OPTIONS.__getitem__,
+            index=_TIME_KEYS.index(st.session_state.time_range),
             key='global_time'
         )
     
     with col2:
-        interval_options = {
-            '15 minute': '15 minutes',
-            'hour': 'Hourly',
-            'day': 'Daily'
-        }
         st.session_state.interval = st.selectbox(
             "Interval",
-            options=list(interval_options.keys()),
-            format_func=lambda x: interval_options[x],
-            index=list(interval_options.keys()).index(st.session_state.interval),
+            options=_INTERVAL_KEYS,
+            format_func=INTERVAL_OPTIONS.__getitem__,
+            index=_INTERVAL_KEYS.index(st.session_state.interval),
             key='global_interval'
         )
     
     with col3:
-        mode_options = ['Auto', 'Approve']
         st.session_state.claude_mode = st.selectbox(
             "Claude Mode",
-            options=mode_options,
-            index=mode_options.index(st.session_state.claude_mode),
+            options=MODE_OPTIONS,
+            index=MODE_OPTIONS.index(st.session_state.claude_mode),
             help="Auto: Claude executes immediately. Approve: Review before execution."
         )
     
@@ -363,33 +437,23 @@ def render_home():
     st.subheader("Recent Dashboards")
     
     try:
-        recent_query = """
-        SELECT 
-            dashboard_id,
-            title,
-            created_at,
-            created_by
-        FROM MCP.VW_DASHBOARDS
-        ORDER BY created_at DESC
-        LIMIT 3
-        """
-        recent_df = session.sql(recent_query).to_pandas()
+        recent = _recent_dashboards()
         
-        if not recent_df.empty:
+        if recent:
             cols = st.columns(3)
-            for i, row in enumerate(recent_df.itertuples()):
+            for i, row in enumerate(recent):
                 with cols[i]:
                     if st.button(
-                        f"📋 {row.TITLE or 'Untitled'}\n\n{row.CREATED_AT}",
-                        key=f"recent_{row.DASHBOARD_ID}",
+                        f"📋 {row['TITLE'] or 'Untitled'}\n\n{row['CREATED_AT']}",
+                        key=f"recent_{row['DASHBOARD_ID']}",
                         use_container_width=True
                     ):
-                        st.session_state.last_dashboard = row.DASHBOARD_ID
-                        st.experimental_set_query_params(dashboard_id=row.DASHBOARD_ID)
-                        st.experimental_rerun()
+                        st.session_state.last_dashboard = row['DASHBOARD_ID']
+                        st.query_params['dashboard_id'] = row['DASHBOARD_ID']
+                        st.rerun()
         else:
             st.info("No recent dashboards. Create one from a preset above!")
-    except:
+    except Exception:
         st.info("Recent dashboards will appear here")
     
     # Favorites
@@ -401,20 +465,82 @@ def render_home():
             with cols[i]:
                 st.button(f"⭐ {fav['title']}", key=f"fav_{i}", use_container_width=True)
 
+# LOG_CLAUDE_EVENTS_BATCH rejects batches above this size
+CLAUDE_EVENT_BATCH_SIZE = 1000
+CLAUDE_EVENT_FLUSH_SECONDS = 0.5
+
+def _claude_event_worker(events_queue):
+    """Drain queued agent events and log each batch in one LOG_CLAUDE_EVENTS_BATCH call"""
+    while True:
+        events = [events_queue.get()]
+        # Gather events from the same user action into one call
+        deadline = time.monotonic() + CLAUDE_EVENT_FLUSH_SECONDS
+        while len(events) < CLAUDE_EVENT_BATCH_SIZE:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                events.append(events_queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        try:
+            session.sql(
+                "CALL MCP.LOG_CLAUDE_EVENTS_BATCH(PARSE_JSON(?)::ARRAY, 'CLAUDE_AGENT')"
+            ).bind(params=[json.dumps(events, default=str)]).collect()
+        except Exception as e:
+            print(f"Failed to log Claude events: {e}")
+
+@st.cache_resource
+def _claude_event_queue():
+    """Process-wide event queue with its logging thread, started once across reruns"""
+    events_queue = queue.Queue()
+    threading.Thread(target=_claude_event_worker, args=(events_queue,), daemon=True).start()
+    return events_queue
+
 def log_claude_event(action, attributes):
-    """Log Claude Code agent events"""
-    try:
-        event_sql = f"""
-        CALL MCP.LOG_CLAUDE_EVENT(OBJECT_CONSTRUCT(
-            'action', 'agent.{action}',
-            'actor_id', 'CLAUDE_CODE',
-            'attributes', PARSE_JSON('{json.dumps(attributes)}'),
-            'occurred_at', CURRENT_TIMESTAMP()
-        ), 'CLAUDE_AGENT')
-        """
-        session.sql(event_sql).collect()
-    except Exception as e:
-        print(f"Failed to log Claude event: {e}")
+    """Queue a Claude Code agent event; a background thread logs it, off the render path"""
+    _claude_event_queue().put({
+        'action': f'agent.{action}',
+        'actor_id': 'CLAUDE_CODE',
+        'attributes': attributes,
+        'occurred_at': get_iso_timestamp()
+    })
+
+# Natural-language patterns as one zero-width alternation, so a single scan of the
+# lowercased text finds every pattern, including overlapping ones ("user actions x")
+_NL_SCAN = re.compile(
+    r'(?='
+    r'last (?P<amount>\d+)\s*(?P<unit>hours?|days?|minutes?)'
+    r'|(?:user|actor)\s+(?P<user>\S+)'
+    r'|actions?\s+(?P<action>\S+)'
+    r'|(?P<by_hour>by hour)'
+    r'|(?P<by_day>by day)'
+    r'|(?P<by_15min>15 min|fifteen min)'
+    r')'
+)
+
+# Time-window unit -> one unit of timedelta
+_UNIT_TO_DELTA = {
+    'hour': timedelta(hours=1),
+    'day': timedelta(days=1),
+    'minute': timedelta(minutes=1)
+}
+
+# Interval phrase group -> (plan interval, confirmation text), in priority order
+_INTERVAL_PHRASES = (
+    ('by_hour', 'hour', " by hour"),
+    ('by_day', 'day', " by day"),
+    ('by_15min', '15 minute', " in 15-minute intervals")
+)
+
+def _scan_nl(lowered):
+    """First match of each natural-language pattern, keyed by group name"""
+    found = {}
+    for match in _NL_SCAN.finditer(lowered):
+        for name, value in match.groupdict().items():
+            if value is not None and name not in found:
+                found[name] = value
+    return found
 
 def parse_natural_language(text):
     """Parse natural language into a plan with human confirmation"""
@@ -428,62 +554,48 @@ def parse_natural_language(text):
     
     confirmation = ""
     plan = None
+    found = _scan_nl(text.lower())
+    now = datetime.now(timezone.utc)
     
     # Time parsing patterns - now with ISO timestamps
-    time_match = re.search(r'last (\d+)\s*(hours?|days?|minutes?)', text.lower())
-    if time_match:
-        amount = int(time_match.group(1))
-        unit = time_match.group(2).rstrip('s')
+    if 'amount' in found:
+        amount = int(found['amount'])
+        unit = found['unit'].rstrip('s')
         confirmation = f"Looking at the last {amount} {unit}"
         
         # Calculate ISO timestamps
-        if unit == 'hour':
-            delta = timedelta(hours=amount)
-        elif unit == 'day':
-            delta = timedelta(days=amount)
-        elif unit == 'minute':
-            delta = timedelta(minutes=amount)
-        else:
-            delta = timedelta(hours=24)
+        delta = _UNIT_TO_DELTA[unit] * amount
         
         plan = {
             "plan_version": "1.0",
             "proc": "DASH_GET_SERIES",
             "params": {
-                "start_ts": get_iso_timestamp(delta),
-                "end_ts": get_iso_timestamp(),
+                "start_ts": get_iso_timestamp(delta, now),
+                "end_ts": get_iso_timestamp(now=now),
                 "interval": "hour" if unit == "hour" else "day",
                 "filters": {}
             }
         }
     
     # User filtering
-    user_match = re.search(r'(?:user|actor)\s+([^\s]+)', text.lower())
-    if user_match and plan:
-        user = user_match.group(1)
+    if 'user' in found and plan:
+        user = found['user']
         confirmation += f" filtered to user {user}"
         plan['params']['filters']['actor'] = user
     
     # Action filtering  
-    action_match = re.search(r'action[s]?\s+([^\s]+)', text.lower())
-    if action_match and plan:
-        action = action_match.group(1)
+    if 'action' in found and plan:
+        action = found['action']
         confirmation += f" for action {action}"
         plan['params']['filters']['action'] = action
     
-    # Interval adjustment
-    if 'by hour' in text.lower():
-        if plan:
-            plan['params']['interval'] = 'hour'
-        confirmation += " by hour"
-    elif 'by day' in text.lower():
-        if plan:
-            plan['params']['interval'] = 'day'
-        confirmation += " by day"
-    elif '15 min' in text.lower() or 'fifteen min' in text.lower():
-        if plan:
-            plan['params']['interval'] = '15 minute'
-        confirmation += " in 15-minute intervals"
+    # Interval adjustment; the first phrase in priority order wins
+    for group, interval, description in _INTERVAL_PHRASES:
+        if group in found:
+            if plan:
+                plan['params']['interval'] = interval
+            confirmation += description
+            break
     
     # Default if no match - use ISO timestamps
     if not plan:
@@ -492,16 +604,17 @@ def parse_natural_language(text):
             "plan_version": "1.0",
             "proc": "DASH_GET_SERIES",
             "params": {
-                "start_ts": get_iso_timestamp(timedelta(hours=24)),
-                "end_ts": get_iso_timestamp(),
+                "start_ts": get_iso_timestamp(timedelta(hours=24), now),
+                "end_ts": get_iso_timestamp(now=now),
                 "interval": "hour",
                 "filters": {}
             }
         }
     
     # Log plan compiled
+    blob = _canon(plan)
     log_claude_event('plan_compiled', {
-        'plan_hash': hashlib.md5(json.dumps(plan).encode()).hexdigest(),
+        'plan_hash': hashlib.blake2b(blob, digest_size=16).hexdigest(),
         'proc': plan['proc'],
         'validation': 'ok'
     })
@@ -564,7 +677,50 @@ def render_agent_console():
         
         if st.button("Close Console"):
             st.session_state.show_agent_console = False
-            st.experimental_rerun()
+            st.rerun()
+
+def _render_metric_panel(data, df):
+    """Metrics display"""
+    cols = st.columns(len(data) if len(data) <= 4 else 4)
+    for i, metric in enumerate(data[:4]):
+        with cols[i]:
+            label = metric.get('label', metric.get('metric', 'Value'))
+            value = metric.get('value', 0)
+            st.metric(label, f"{value:,}")
+
+def _render_line_panel(data, df):
+    """Time series chart"""
+    if 'TIME_BUCKET' in df.columns:
+        chart_df = df.assign(
+            Time=pd.to_datetime(df['TIME_BUCKET'], format='ISO8601', utc=True),
+            Count=df.get('EVENT_COUNT', df.get('CNT', 0))
+        ).set_index('Time')
+        st.line_chart(chart_df['Count'], height=400)
+
+def _render_bar_panel(data, df):
+    """Bar chart for rankings"""
+    if len(df) > 0:
+        # Find item and count columns
+        item_col = next((c for c in df.columns if c in ('ITEM', 'DIMENSION')), df.columns[0])
+        count_col = next((c for c in df.columns if c in ('COUNT', 'CNT', 'EVENT_COUNT')), df.columns[-1])
+        
+        if item_col and count_col:
+            st.bar_chart(df.set_index(item_col)[count_col], height=400)
+            
+            # Claude's explanation
+            st.caption(f"🤖 Claude aggregated {count_col.lower()} by {item_col.lower()} for your selected time range")
+
+def _render_table_panel(data, df):
+    """Table for events"""
+    st.dataframe(df, use_container_width=True, height=400)
+
+# Panel type -> renderer; each takes the raw rows and the upper-cased DataFrame
+PANEL_RENDERERS = {
+    'metric': _render_metric_panel,
+    'line': _render_line_panel,
+    'bar': _render_bar_panel,
+    'table': _render_table_panel
+}
 
 def render_result_canvas():
     """Render the result canvas with focus controls"""
@@ -576,7 +732,7 @@ def render_result_canvas():
         st.info("Select a preset from the home screen to begin")
         if st.button("← Back to Home"):
             st.session_state.view_mode = 'home'
-            st.experimental_rerun()
+            st.rerun()
         return
     
     # Header with Claude branding
@@ -598,11 +754,11 @@ def render_result_canvas():
     with col3:
         if st.button("🤖 Console", help="View Claude's process"):
             st.session_state.show_agent_console = True
-            st.experimental_rerun()
+            st.rerun()
     with col4:
         if st.button("🏠 Home"):
             st.session_state.view_mode = 'home'
-            st.experimental_rerun()
+            st.rerun()
     
     # Check execution mode
     if st.session_state.claude_mode == 'Approve' and st.session_state.get('needs_approval'):
@@ -621,66 +777,42 @@ CALL MCP.{plan['proc']}(
         with col1:
             if st.button("✅ Approve", type="primary"):
                 st.session_state.needs_approval = False
-                st.experimental_rerun()
+                st.rerun()
         with col2:
             if st.button("✏️ Modify"):
                 st.info("Modification not yet implemented")
         with col3:
             if st.button("❌ Cancel"):
                 st.session_state.current_plan = None
+                st.session_state.plan_params_json = None
+                st.session_state.plan_dirty = True
                 st.session_state.needs_approval = False
-                st.experimental_rerun()
+                st.rerun()
         return
     
-    # Execute current plan
-    with st.spinner(f"Claude is calling {st.session_state.current_plan.get('proc', 'procedure')}..."):
-        data = execute_plan(st.session_state.current_plan)
+    # Execute current plan only when it changed; other widget reruns reuse the last data
+    if st.session_state.plan_dirty:
+        with st.spinner(f"Claude is calling {st.session_state.current_plan.get('proc', 'procedure')}..."):
+            st.session_state.last_data = execute_plan(
+                st.session_state.current_plan, st.session_state.plan_params_json
+            )
+        st.session_state.plan_dirty = False
+    data = st.session_state.last_data
     
-    if data:
+    if data is not None and len(data) > 0:
+        # Build the frame once; upper-case column names once for lookups
+        df = data.copy(deep=False) if isinstance(data, pd.DataFrame) else pd.DataFrame.from_records(data)
+        df.columns = df.columns.astype(str).str.upper()
+        
         # Render based on panel type
         panel_type = st.session_state.current_plan.get('panels', [{}])[0].get('type', 'bar')
-        
-        if panel_type == 'metric':
-            # Metrics display
-            cols = st.columns(len(data) if len(data) <= 4 else 4)
-            for i, metric in enumerate(data[:4]):
-                with cols[i]:
-                    label = metric.get('label', metric.get('metric', 'Value'))
-                    value = metric.get('value', 0)
-                    st.metric(label, f"{value:,}")
-        
-        elif panel_type == 'line':
-            # Time series chart
-            df = pd.DataFrame(data)
-            if 'TIME_BUCKET' in df.columns:
-                df['Time'] = pd.to_datetime(df['TIME_BUCKET'])
-                df['Count'] = df.get('EVENT_COUNT', df.get('CNT', 0))
-                df = df.set_index('Time')
-                st.line_chart(df['Count'], height=400)
-        
-        elif panel_type == 'bar':
-            # Bar chart for rankings
-            df = pd.DataFrame(data)
-            if len(df) > 0:
-                # Find item and count columns
-                item_col = next((c for c in df.columns if c.upper() in ['ITEM', 'DIMENSION']), df.columns[0])
-                count_col = next((c for c in df.columns if c.upper() in ['COUNT', 'CNT', 'EVENT_COUNT']), df.columns[-1])
-                
-                if item_col and count_col:
-                    df = df.set_index(item_col)
-                    st.bar_chart(df[count_col], height=400)
-                    
-                    # Claude's explanation
-                    st.caption(f"🤖 Claude aggregated {count_col.lower()} by {item_col.lower()} for your selected time range")
-        
-        elif panel_type == 'table':
-            # Table for events
-            df = pd.DataFrame(data)
-            st.dataframe(df, use_container_width=True, height=400)
+        render_panel = PANEL_RENDERERS.get(panel_type)
+        if render_panel:
+            render_panel(data, df)
         
         # Compact data preview
         with st.expander("📋 Data Preview"):
-            st.dataframe(pd.DataFrame(data).head(10))
+            st.dataframe(df.head(10))
     
     st.divider()
     
@@ -695,7 +827,9 @@ CALL MCP.{plan['proc']}(
             if 'filters' not in st.session_state.current_plan['params']:
                 st.session_state.current_plan['params']['filters'] = {}
             st.session_state.current_plan['params']['filters']['actor'] = actor_filter
-            st.experimental_rerun()
+            st.session_state.plan_params_json = None
+            st.session_state.plan_dirty = True
+            st.rerun()
     
     with col2:
         action_filter = st.text_input("Filter by action", placeholder="e.g., user.login")
@@ -703,14 +837,18 @@ CALL MCP.{plan['proc']}(
             if 'filters' not in st.session_state.current_plan['params']:
                 st.session_state.current_plan['params']['filters'] = {}
             st.session_state.current_plan['params']['filters']['action'] = action_filter
-            st.experimental_rerun()
+            st.session_state.plan_params_json = None
+            st.session_state.plan_dirty = True
+            st.rerun()
     
     with col3:
         group_options = ["None", "action", "actor", "source"]
         group_by = st.selectbox("Group by", options=group_options)
         if group_by != "None" and st.button("Apply Grouping", key="apply_group"):
             st.session_state.current_plan['params']['group_by'] = group_by
-            st.experimental_rerun()
+            st.session_state.plan_params_json = None
+            st.session_state.plan_dirty = True
+            st.rerun()
     
     # Natural language refinement with Claude
     st.divider()
@@ -740,6 +878,8 @@ CALL MCP.{plan['proc']}(
         plan, confirmation = parse_natural_language(nl_input)
         st.success(f"✓ {confirmation}")
         st.session_state.current_plan = plan
+        st.session_state.plan_params_json = None
+        st.session_state.plan_dirty = True
         
         if st.session_state.claude_mode == 'Approve':
             st.session_state.needs_approval = True
@@ -748,12 +888,44 @@ CALL MCP.{plan['proc']}(
         if 'nl_example' in st.session_state:
             del st.session_state.nl_example
         
-        st.experimental_rerun()
+        st.rerun()
     
     # Schedule modal
     if st.session_state.get('show_schedule'):
         render_schedule_modal()
 
+# Event statements have fixed text; values are bound so Snowflake reuses the compiled plan
+DASHBOARD_CREATED_SQL = """
+CALL MCP.LOG_CLAUDE_EVENT(OBJECT_CONSTRUCT(
+    'action', 'dashboard.created',
+    'actor_id', CURRENT_USER(),
+    'object', OBJECT_CONSTRUCT(
+        'type', 'dashboard',
+        'id', ?
+    ),
+    'attributes', OBJECT_CONSTRUCT(
+        'title', ?,
+        'spec', PARSE_JSON(?),
+        'plan_hash', ?,
+        'dedupe_key', ?
+    ),
+    'occurred_at', CURRENT_TIMESTAMP()
+), 'COO_UI')
+"""
+
+# The payload is built client-side so the whole event travels as one bound VARIANT;
+# the actor is stamped server-side, and LOG_CLAUDE_EVENT fills event_id and occurred_at
+SCHEDULE_CREATED_SQL = "CALL MCP.LOG_CLAUDE_EVENT(OBJECT_INSERT(PARSE_JSON(?), 'actor_id', CURRENT_USER()), ?)"
+
+# Every subset of delivery channels, mapped to its list in canonical order
+DELIVERY_OPTIONS = ["email", "slack"]
+DELIVERY_COMBOS = {
+    frozenset(c): list(c)
+    for c in itertools.chain.from_iterable(
+        itertools.combinations(DELIVERY_OPTIONS, r) for r in range(len(DELIVERY_OPTIONS) + 1)
+    )
+}
+
 def save_dashboard():
     """Save current canvas as a dashboard"""
     dashboard_id = f"dash_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
@@ -766,30 +938,21 @@ def save_dashboard():
                 "panels": st.session_state.current_plan.get('panels', []),
                 "plan": st.session_state.current_plan
             }
+            blob = _canon(spec)
             
             # Log dashboard.created event
-            sql = f"""
-            CALL MCP.LOG_CLAUDE_EVENT(OBJECT_CONSTRUCT(
-                'action', 'dashboard.created',
-                'actor_id', CURRENT_USER(),
-                'object', OBJECT_CONSTRUCT(
-                    'type', 'dashboard',
-                    'id', '{dashboard_id}'
-                ),
-                'attributes', OBJECT_CONSTRUCT(
-                    'title', '{title}',
-                    'spec', PARSE_JSON('{json.dumps(spec)}'),
-                    'plan_hash', '{hashlib.md5(json.dumps(spec).encode()).hexdigest()}',
-                    'dedupe_key', '{dashboard_id}'
-                ),
-                'occurred_at', CURRENT_TIMESTAMP()
-            ), 'COO_UI')
-            """
-            session.sql(sql).collect()
+            session.sql(DASHBOARD_CREATED_SQL).bind(params=[
+                dashboard_id,
+                title,
+                blob.decode(),
+                hashlib.blake2b(blob, digest_size=16).hexdigest(),
+                dashboard_id
+            ]).collect()
             
             st.success(f"✅ Claude Code saved your dashboard! Deep link: /d/{dashboard_id}")
             st.balloons()
             st.session_state.last_dashboard = dashboard_id
+            _recent_dashboards.clear()
             
             # Log dashboard created by Claude
             log_claude_event('dashboard_created', {
@@ -835,7 +998,7 @@ def render_schedule_modal():
             
             delivery = st.multiselect(
                 "Deliver to",
-                options=["email", "slack"],
+                options=DELIVERY_OPTIONS,
                 default=["email"]
             )
         
@@ -844,27 +1007,22 @@ def render_schedule_modal():
                 schedule_id = f"sched_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
                 
                 # Log schedule event
-                sql = f"""
-                CALL MCP.LOG_CLAUDE_EVENT(OBJECT_CONSTRUCT(
-                    'action', 'dashboard.schedule_created',
-                    'actor_id', CURRENT_USER(),
-                    'object', OBJECT_CONSTRUCT(
-                        'type', 'schedule',
-                        'id', '{schedule_id}'
-                    ),
-                    'attributes', OBJECT_CONSTRUCT(
-                        'dashboard_id', '{st.session_state.last_dashboard}',
-                        'frequency', '{frequency}',
-                        'time', '{time_input.strftime("%H:%M")}',
-                        'timezone', '{timezone}',
-                        'display_tz', '{tz_options[timezone]}',
-                        'deliveries', ARRAY_CONSTRUCT({','.join([f"'{d}'" for d in delivery])}),
-                        'dedupe_key', '{schedule_id}'
-                    ),
-                    'occurred_at', CURRENT_TIMESTAMP()
-                ), 'COO_UI')
-                """
-                session.sql(sql).collect()
+                payload = {
+                    "action": "dashboard.schedule_created",
+                    "object": {"type": "schedule", "id": schedule_id},
+                    "attributes": {
+                        "dashboard_id": st.session_state.last_dashboard,
+                        "frequency": frequency,
+                        "time": time_input.strftime("%H:%M"),
+                        "timezone": timezone,
+                        "display_tz": tz_options[timezone],
+                        "deliveries": DELIVERY_COMBOS[frozenset(delivery)],
+                        "dedupe_key": schedule_id
+                    }
+                }
+                session.sql(SCHEDULE_CREATED_SQL).bind(
+                    params=[_canon(payload).decode(), 'COO_UI']
+                ).collect()
                 
                 # Calculate next run
                 next_run = datetime.now().replace(
@@ -883,21 +1041,17 @@ def render_schedule_modal():
         
         if st.button("Cancel", key="cancel_schedule"):
             st.session_state.show_schedule = False
-            st.experimental_rerun()
+            st.rerun()
 
 def main():
     """Main application entry point"""
     # Check for dashboard in URL params
-    try:
-        query_params = st.experimental_get_query_params()
-        dashboard_id = query_params.get('dashboard_id', [None])[0]
-        
-        if dashboard_id:
-            # Load and display specific dashboard
-            st.session_state.last_dashboard = dashboard_id
-            # Would load dashboard spec here
-    except:
-        pass
+    dashboard_id = st.query_params.get('dashboard_id')
+    
+    if dashboard_id:
+        # Load and display specific dashboard
+        st.session_state.last_dashboard = dashboard_id
+        # Would load dashboard spec here
     
     # Determine view mode
     if 'view_mode' not in st.session_state:
@@ -16,9 +16,12 @@ Architecture:
 
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 import plotly.graph_objects as go
+import pyarrow as pa
+import functools
 import json
+import time
+import uuid
 import datetime as dt
 from datetime import timezone, timedelta
 
@@ -37,49 +40,99 @@ if 'snowflake' not in st.session_state:
 
 session = st.session_state.snowflake
 
-# Ensure we're using the correct role and database
-try:
-    session.sql("USE ROLE R_CLAUDE_AGENT").collect()
-    session.sql("USE DATABASE CLAUDE_BI").collect()
-    session.sql("USE SCHEMA MCP").collect()
-except Exception as e:
-    st.error(f"⚠️ Database connection issue: {e}")
-    st.stop()
+# Ensure we're using the correct role and database (once per session, in one round-trip)
+if 'initialized' not in st.session_state:
+    try:
+        session.connection.cursor().execute(
+            "USE ROLE R_CLAUDE_AGENT; USE DATABASE CLAUDE_BI; USE SCHEMA MCP",
+            num_statements=3
+        )
+        st.session_state.ctx = (session.get_current_database(), session.get_current_schema())
+        st.session_state.initialized = True
+    except Exception as e:
+        st.error(f"⚠️ Database connection issue: {e}")
+        st.stop()
 
 # ===================================================================
 # HELPER FUNCTIONS
 # ===================================================================
 
-def call_procedure(proc_name, params=None):
+# Procedures that write state; their calls skip the cache and invalidate it
+MUTATING_PROCS = frozenset({"SAVE_DASHBOARD_SPEC", "CREATE_DASHBOARD_SCHEDULE"})
+
+def _run_procedure(proc_name, params_json):
+    """Call a procedure and decode its result; errors propagate to the caller"""
+    if params_json:
+        df = session.sql(f"CALL MCP.{proc_name}(PARSE_JSON(?))", params=[params_json])
+    else:
+        df = session.sql(f"CALL MCP.{proc_name}()")
+    
+    return _decode_result(df.collect())
+
+def _unwrap(value):
+    """Decode a VARIANT value once; values Snowpark already decoded pass through"""
+    if isinstance(value, (str, bytes)):
+        return json.loads(value)
+    return value
+
+def _decode_result(rows):
+    """Return the first column of the first row (procedure result), decoded"""
+    if rows:
+        return _unwrap(rows[0][0])
+    return {"ok": False, "error": "No result returned"}
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _call_procedure_cached(proc_name, params_json):
+    """Cached read-only procedure call, keyed on the proc name and serialized params"""
+    return _run_procedure(proc_name, params_json)
+
+def call_procedure(proc_name, params=None, _nocache=False):
     """Call a Snowflake procedure safely with error handling"""
     try:
-        if params:
-            params_json = json.dumps(params)
-            df = session.sql(f"CALL MCP.{proc_name}(PARSE_JSON(?))", params=[params_json])
-        else:
-            df = session.sql(f"CALL MCP.{proc_name}()")
-        
-        rows = df.collect()
-        if rows:
-            # Return the first column of first row (procedure result)
-            result = rows[0][0]
-            if isinstance(result, str):
-                return json.loads(result)
+        params_json = json.dumps(params) if params else None
+        if _nocache or proc_name in MUTATING_PROCS:
+            result = _run_procedure(proc_name, params_json)
+            if isinstance(result, dict) and result.get("ok"):
+                st.cache_data.clear()
             return result
-        return {"ok": False, "error": "No result returned"}
+        return _call_procedure_cached(proc_name, params_json)
     except Exception as e:
         return {"ok": False, "error": str(e)}
 
+NL_POLL_SECONDS = 0.2
+
+def submit_nl_compile(user_query, proc_name="COMPILE_NL_PLAN"):
+    """Start COMPILE_NL_PLAN (or the fused COMPILE_AND_RUN_NL) without blocking and return its query id"""
+    job = session.sql(
+        f"CALL MCP.{proc_name}(PARSE_JSON(?))",
+        params=[json.dumps({"text": user_query})]
+    ).collect_nowait()
+    return job.query_id
+
+def poll_nl_compile(query_id):
+    """Wait for a submitted COMPILE_NL_PLAN job, showing progress, and decode its result"""
+    progress = st.progress(0, text="Waiting for Claude's plan...")
+    ticks = 0
+    try:
+        job = session.create_async_job(query_id)
+        while not job.is_done():
+            time.sleep(NL_POLL_SECONDS)
+            ticks += 1
+            progress.progress(min(ticks, 95), text="Waiting for Claude's plan...")
+        return _decode_result(job.result())
+    except Exception as e:
+        return {"ok": False, "error": str(e)}
+    finally:
+        progress.empty()
+
+@functools.lru_cache(maxsize=4096)
 def format_timestamp(ts_str):
-    """Format timestamp for display"""
+    """Format an ISO timestamp string for display; callers pass str() of the raw value"""
     try:
-        if isinstance(ts_str, str):
-            ts = dt.datetime.fromisoformat(ts_str.replace('Z', '+00:00'))
-        else:
-            ts = ts_str
-        return ts.strftime("%Y-%m-%d %H:%M UTC")
-    except:
-        return str(ts_str)
+        ts = dt.datetime.fromisoformat(ts_str[:-1] + "+00:00" if ts_str.endswith('Z') else ts_str)
+    except ValueError:
+        return ts_str
+    return ts.strftime("%Y-%m-%d %H:%M UTC")
 
 def create_chart(chart_type, data, title="Chart"):
     """Create Plotly chart from procedure data"""
@@ -99,11 +152,13 @@ def create_chart(chart_type, data, title="Chart"):
             return df
         elif chart_type == "series" and len(df.columns) >= 2:
             # Time series chart
-            fig = px.line(df, x=df.columns[0], y=df.columns[1], title=title)
+            fig = go.Figure(go.Scatter(x=df.iloc[:, 0].to_numpy(), y=df.iloc[:, 1].to_numpy(), mode="lines"))
+            fig.update_layout(title=title, xaxis_title=df.columns[0], yaxis_title=df.columns[1])
             return fig
         elif chart_type == "topn" and len(df.columns) >= 2:
             # Bar chart
-            fig = px.bar(df, x=df.columns[0], y=df.columns[1], title=title)
+            fig = go.Figure(go.Bar(x=df.iloc[:, 0].to_numpy(), y=df.iloc[:, 1].to_numpy()))
+            fig.update_layout(title=title, xaxis_title=df.columns[0], yaxis_title=df.columns[1])
             return fig
         elif chart_type == "events":
             # Table view
@@ -113,6 +168,26 @@ def create_chart(chart_type, data, title="Chart"):
         st.error(f"Chart creation error: {e}")
         return None
 
+# DASH_GET_EVENTS returns a fixed set of fields; declaring them skips type inference
+EVENTS_SCHEMA = pa.schema([
+    ("event_id", pa.string()),
+    ("action", pa.string()),
+    ("actor_id", pa.string()),
+    ("object_type", pa.string()),
+    ("object_id", pa.string()),
+    ("occurred_at", pa.string()),
+    ("source", pa.string())
+])
+
+# Static UI text and payload fields, built once at import rather than per click
+GUARDRAIL_MD = """
+- ✅ Database: CLAUDE_BI.MCP only  
+- ✅ Role: R_CLAUDE_AGENT
+- ✅ Limits: Clamped to safe values
+"""
+
+_SCHED_TEMPLATE = {"enabled": True}
+
 # ===================================================================
 # CLAUDE CODE STATUS COMPONENT
 # ===================================================================
@@ -185,13 +260,23 @@ def natural_language_interface():
         execute_button = st.button("Ask Claude", type="primary")
     
     if execute_button and user_query:
+        # Submit the compile asynchronously; a rerun resumes polling the same job
+        # Auto mode compiles and runs the plan server-side in one call
+        proc_name = "COMPILE_NL_PLAN" if st.session_state.get("claude_mode") == "Approve" else "COMPILE_AND_RUN_NL"
+        st.session_state.nl_job_id = submit_nl_compile(user_query, proc_name)
+    
+    if "nl_job_id" in st.session_state:
         with st.spinner("🤖 Claude is analyzing your request..."):
             
             # Step 1: Compile natural language to plan
             st.write("**🧠 Claude is thinking...**")
-            intent = {"text": user_query}
             
-            compile_result = call_procedure("COMPILE_NL_PLAN", intent)
+            compiled = poll_nl_compile(st.session_state.nl_job_id)
+            del st.session_state.nl_job_id
+            
+            # The fused procedure wraps the compile output and the plan result together
+            compile_result = compiled.get("compile", compiled)
+            execute_result = compiled.get("result")
             
             if not compile_result.get("ok"):
                 st.error(f"❌ Claude couldn't understand: {compile_result.get('error')}")
@@ -211,16 +296,10 @@ def natural_language_interface():
                 })
             
             with plan_col2:
-                st.markdown(f"""
-                **Guardrails Applied:**
-                - ✅ Procedure: `{plan.get("proc")}` (whitelisted)
-                - ✅ Database: CLAUDE_BI.MCP only  
-                - ✅ Role: R_CLAUDE_AGENT
-                - ✅ Limits: Clamped to safe values
-                """)
+                st.markdown(f"**Guardrails Applied:**\n- ✅ Procedure: `{plan.get('proc')}` (whitelisted){GUARDRAIL_MD}")
             
             # Approval flow
-            if st.session_state.get("claude_mode") == "Approve":
+            if execute_result is None and st.session_state.get("claude_mode") == "Approve":
                 st.write("**⏸️ Waiting for your approval...**")
                 
                 col1, col2 = st.columns(2)
@@ -241,7 +320,8 @@ def natural_language_interface():
             # Step 2: Execute the plan
             st.write("**⚙️ Claude is executing the plan...**")
             
-            execute_result = call_procedure("RUN_PLAN", plan)
+            if execute_result is None:
+                execute_result = call_procedure("RUN_PLAN", plan)
             
             if not execute_result.get("ok"):
                 st.error(f"❌ Execution failed: {execute_result.get('error')}")
@@ -262,7 +342,7 @@ def natural_language_interface():
             if rows and len(rows) > 0:
                 try:
                     # The procedure returns JSON results
-                    proc_result = json.loads(rows[0][0]) if isinstance(rows[0][0], str) else rows[0][0]
+                    proc_result = _unwrap(rows[0][0])
                     
                     if proc_result.get("ok"):
                         data = proc_result.get("data", [])
@@ -272,34 +352,28 @@ def natural_language_interface():
                         if procedure == "DASH_GET_SERIES":
                             # Time series chart
                             if isinstance(data, list) and data:
-                                chart_data = []
-                                for item in data:
-                                    chart_data.append([
-                                        item.get("time_bucket", ""),
-                                        item.get("event_count", 0),
-                                        item.get("unique_actors", 0)
-                                    ])
-                                
-                                df = pd.DataFrame(chart_data, columns=["Time", "Events", "Unique Users"])
-                                fig = px.line(df, x="Time", y="Events", title="Activity Over Time")
+                                df = pd.DataFrame.from_records(
+                                    data, columns=["time_bucket", "event_count", "unique_actors"]
+                                ).fillna({"event_count": 0, "unique_actors": 0})
+                                df.columns = ["Time", "Events", "Unique Users"]
+                                df["Time"] = pd.to_datetime(df["Time"], format="ISO8601", utc=True, errors="coerce")
+                                fig = go.Figure(go.Scatter(x=df["Time"].to_numpy(), y=df["Events"].to_numpy(), mode="lines"))
+                                fig.update_layout(title="Activity Over Time", xaxis_title="Time", yaxis_title="Events")
                                 st.plotly_chart(fig, use_container_width=True)
                                 
                                 # Show summary
-                                total_events = df["Events"].sum()
+                                total_events = int(df["Events"].to_numpy().sum())
                                 st.metric("Total Events", total_events)
                         
                         elif procedure == "DASH_GET_TOPN":
                             # Top N chart
                             if isinstance(data, list) and data:
-                                chart_data = []
-                                for item in data:
-                                    chart_data.append([
-                                        item.get("dimension", ""),
-                                        item.get("count", 0)
-                                    ])
-                                
-                                df = pd.DataFrame(chart_data, columns=["Item", "Count"])
-                                fig = px.bar(df, x="Item", y="Count", title="Top Items")
+                                df = pd.DataFrame.from_records(
+                                    data, columns=["dimension", "count"]
+                                ).fillna({"dimension": "", "count": 0})
+                                df.columns = ["Item", "Count"]
+                                fig = go.Figure(go.Bar(x=df["Item"].to_numpy(), y=df["Count"].to_numpy()))
+                                fig.update_layout(title="Top Items", xaxis_title="Item", yaxis_title="Count")
                                 st.plotly_chart(fig, use_container_width=True)
                         
                         elif procedure == "DASH_GET_METRICS":
@@ -319,8 +393,8 @@ def natural_language_interface():
                         elif procedure == "DASH_GET_EVENTS":
                             # Events table
                             if isinstance(data, list) and data:
-                                df = pd.DataFrame(data)
-                                st.dataframe(df, use_container_width=True)
+                                tbl = pa.Table.from_pylist(data, schema=EVENTS_SCHEMA)
+                                st.dataframe(tbl, use_container_width=True)
                         
                         # Show Claude's explanation
                         st.info(f"🤖 Claude executed `{procedure}` and found {len(data) if isinstance(data, list) else 'metrics'} results")
@@ -365,8 +439,8 @@ def dashboard_management():
         
         if "panels" not in st.session_state:
             st.session_state.panels = [
-                {"type": "metrics", "title": "Key Metrics"},
-                {"type": "series", "title": "Activity Trends"}
+                {"id": uuid.uuid4().hex, "type": "metrics", "title": "Key Metrics"},
+                {"id": uuid.uuid4().hex, "type": "series", "title": "Activity Trends"}
             ]
         
         for i, panel in enumerate(st.session_state.panels):
@@ -376,24 +450,25 @@ def dashboard_management():
                 panel_type = st.selectbox(f"Panel {i+1} Type", 
                                         ["metrics", "series", "topn", "events"], 
                                         index=["metrics", "series", "topn", "events"].index(panel["type"]),
-                                        key=f"panel_type_{i}")
+                                        key=f"panel_type_{panel['id']}")
             
             with col2:
-                panel_title = st.text_input(f"Panel {i+1} Title", panel["title"], key=f"panel_title_{i}")
+                panel_title = st.text_input(f"Panel {i+1} Title", panel["title"], key=f"panel_title_{panel['id']}")
             
             with col3:
                 if panel_type == "series":
-                    interval = st.selectbox("Interval", ["hour", "day"], key=f"interval_{i}")
+                    interval = st.selectbox("Interval", ["hour", "day"], key=f"interval_{panel['id']}")
                 elif panel_type == "topn":
-                    dimension = st.selectbox("Dimension", ["action", "actor_id", "source"], key=f"dimension_{i}")
+                    dimension = st.selectbox("Dimension", ["action", "actor_id", "source"], key=f"dimension_{panel['id']}")
             
             with col4:
-                if st.button("🗑️", key=f"remove_{i}", help="Remove panel"):
-                    st.session_state.panels.pop(i)
+                if st.button("🗑️", key=f"remove_{panel['id']}", help="Remove panel"):
+                    st.session_state.panels[:] = [p for p in st.session_state.panels if p["id"] != panel["id"]]
                     st.rerun()
             
             # Update panel in session state
             st.session_state.panels[i] = {
+                "id": panel["id"],
                 "type": panel_type,
                 "title": panel_title,
                 "params": {}
@@ -401,7 +476,11 @@ def dashboard_management():
         
         # Add panel button
         if st.button("➕ Add Panel"):
-            st.session_state.panels.append({"type": "metrics", "title": f"Panel {len(st.session_state.panels) + 1}"})
+            st.session_state.panels.append({
+                "id": uuid.uuid4().hex,
+                "type": "metrics",
+                "title": f"Panel {len(st.session_state.panels) + 1}"
+            })
             st.rerun()
         
         # Create dashboard button
@@ -445,7 +524,7 @@ def dashboard_management():
                             st.caption(f"ID: {dashboard.get('dashboard_id')} • {dashboard.get('panel_count', 0)} panels")
                         
                         with col2:
-                            st.caption(format_timestamp(dashboard.get('created_at')))
+                            st.caption(format_timestamp(str(dashboard.get('created_at'))))
                         
                         with col3:
                             if st.button("📅 Schedule", key=f"schedule_{dashboard.get('dashboard_id')}"):
@@ -489,15 +568,15 @@ def scheduling_interface():
                 recipients = ""
         
         if st.button("📅 Create Schedule"):
-            schedule_spec = {
-                "dashboard_id": dashboard_id,
-                "frequency": frequency,
-                "time": time_str.strftime("%H:%M"),
-                "timezone": timezone,
-                "deliveries": [d for d in (["email"] if email_delivery else []) + (["slack"] if slack_delivery else [])],
-                "recipients": [r.strip() for r in recipients.split('\n') if r.strip()],
-                "enabled": True
-            }
+            schedule_spec = dict(_SCHED_TEMPLATE)
+            schedule_spec.update(
+                dashboard_id=dashboard_id,
+                frequency=frequency,
+                time=time_str.strftime("%H:%M"),
+                timezone=timezone,
+                deliveries=[d for d, on in (("email", email_delivery), ("slack", slack_delivery)) if on],
+                recipients=[r.strip() for r in recipients.split('\n') if r.strip()]
+            )
             
             with st.spinner("Creating schedule..."):
                 result = call_procedure("CREATE_DASHBOARD_SCHEDULE", schedule_spec)
@@ -517,97 +596,124 @@ def scheduling_interface():
 # SYSTEM MONITORING
 # ===================================================================
 
+# One round-trip for the table and activity sections: each CTE yields a (TAG, PAYLOAD) row
+MONITORING_SQL = """
+    WITH t AS (
+        SELECT 'tables' AS tag, OBJECT_CONSTRUCT('count', COUNT(*))::VARIANT AS payload
+        FROM CLAUDE_BI.INFORMATION_SCHEMA.TABLES
+        WHERE TABLE_CATALOG = 'CLAUDE_BI'
+          AND TABLE_SCHEMA IN ('LANDING', 'ACTIVITY')
+          AND TABLE_TYPE IN ('BASE TABLE', 'DYNAMIC TABLE')
+    ), a AS (
+        SELECT 'activity' AS tag,
+               ARRAY_AGG(OBJECT_CONSTRUCT_KEEP_NULL(
+                   'action', action,
+                   'actor_id', actor_id,
+                   'source', source,
+                   -- ISO 8601 in UTC so format_timestamp can parse it
+                   'occurred_at', TO_VARCHAR(CONVERT_TIMEZONE('UTC', occurred_at), 'YYYY-MM-DD"T"HH24:MI:SS.FF3TZH:TZM'),
+                   'status', status
+               )) WITHIN GROUP (ORDER BY occurred_at DESC)::VARIANT AS payload
+        FROM (
+            SELECT 
+                action,
+                actor_id,
+                source,
+                occurred_at,
+                attributes:status::string as status
+            FROM ACTIVITY.EVENTS
+            WHERE source = 'CLAUDE_CODE' OR actor_id = 'CLAUDE_CODE_AI_AGENT'
+            ORDER BY occurred_at DESC
+            LIMIT 10
+        )
+    )
+    SELECT * FROM t
+    UNION ALL SELECT * FROM a
+"""
+
+# Task state is only exposed through SHOW TASKS, so it is read on its own
+TASK_STATUS_SQL = "SHOW TASKS LIKE 'TASK_RUN_SCHEDULES'"
+
 def system_monitoring():
     """System health and monitoring dashboard"""
     
     st.markdown("## 🔍 System Monitoring")
     
+    _monitoring_fragment()
+
+@st.fragment(run_every=30)
+def _monitoring_fragment():
+    """Monitoring sections; re-runs on their own 30s cadence without rerunning the app"""
+    
+    try:
+        monitoring = session.sql(MONITORING_SQL).to_pandas()
+        sections = {
+            tag: _unwrap(payload)
+            for tag, payload in zip(monitoring["TAG"], monitoring["PAYLOAD"])
+        }
+    except Exception as e:
+        st.error(f"Error loading monitoring data: {e}")
+        sections = None
+    
+    if sections is not None:
+        _render_table_activity_sections(sections)
+    
+    _render_task_section()
+
+def _render_table_activity_sections(sections):
+    """Two-Table Law and recent activity sections from the batched monitoring read"""
+    
     # Two-Table Law validation
     st.markdown("### 🏛️ Two-Table Law Compliance")
     
-    try:
-        table_check = session.sql("""
-            SELECT COUNT(*) as table_count
-            FROM CLAUDE_BI.INFORMATION_SCHEMA.TABLES
-            WHERE TABLE_CATALOG = 'CLAUDE_BI'
-              AND TABLE_SCHEMA IN ('LANDING', 'ACTIVITY')
-              AND TABLE_TYPE IN ('BASE TABLE', 'DYNAMIC TABLE')
-        """).collect()
-        
-        table_count = table_check[0]["TABLE_COUNT"]
-        
-        if table_count == 2:
-            st.success(f"✅ Two-Table Law: Exactly {table_count} tables (COMPLIANT)")
-        else:
-            st.error(f"❌ Two-Table Law: Found {table_count} tables (VIOLATION)")
+    table_count = sections.get("tables", {}).get("count", 0)
     
-    except Exception as e:
-        st.error(f"Error checking tables: {e}")
+    if table_count == 2:
+        st.success(f"✅ Two-Table Law: Exactly {table_count} tables (COMPLIANT)")
+    else:
+        st.error(f"❌ Two-Table Law: Found {table_count} tables (VIOLATION)")
     
     # Recent activity
     st.markdown("### 📊 Recent Claude Code Activity")
     
-    try:
-        recent_activity = session.sql("""
-            SELECT 
-                action,
-                actor_id,
-                source,
-                occurred_at,
-                attributes:status::string as status
-            FROM ACTIVITY.EVENTS
-            WHERE source = 'CLAUDE_CODE' OR actor_id = 'CLAUDE_CODE_AI_AGENT'
-            ORDER BY occurred_at DESC
-            LIMIT 10
-        """).collect()
+    recent_activity = sections.get("activity") or []
+    
+    if recent_activity:
+        df = pd.DataFrame.from_records(
+            recent_activity,
+            columns=["action", "actor_id", "source", "status", "occurred_at"]
+        )
+        df["status"] = df["status"].fillna("success")
+        df["occurred_at"] = df["occurred_at"].astype(str).map(format_timestamp)
+        df.columns = ["Action", "Actor", "Source", "Status", "Time"]
         
-        if recent_activity:
-            activity_data = []
-            for row in recent_activity:
-                activity_data.append({
-                    "Action": row["ACTION"],
-                    "Actor": row["ACTOR_ID"],
-                    "Source": row["SOURCE"],
-                    "Status": row["STATUS"] or "success",
-                    "Time": format_timestamp(row["OCCURRED_AT"])
-                })
-            
-            st.dataframe(pd.DataFrame(activity_data), use_container_width=True)
-        else:
-            st.info("No recent Claude Code activity")
+        st.dataframe(df, use_container_width=True)
+    else:
+        st.info("No recent Claude Code activity")
     
-    except Exception as e:
-        st.error(f"Error loading activity: {e}")
+def _render_task_section():
+    """Serverless task status; isolated so a failure here leaves the other sections intact"""
     
     # Task execution status
     st.markdown("### ⚙️ Serverless Task Status")
     
     try:
-        task_status = session.sql("""
-            SELECT 
-                name,
-                state,
-                schedule,
-                warehouse,
-                last_committed_on
-            FROM INFORMATION_SCHEMA.TASKS
-            WHERE name = 'TASK_RUN_SCHEDULES'
-        """).collect()
+        task_rows = session.sql(TASK_STATUS_SQL).collect()
         
-        if task_status:
-            task = task_status[0]
-            status_color = "🟢" if task["STATE"] == "started" else "🔴"
+        if task_rows:
+            task = task_rows[0].as_dict()
+            status_color = "🟢" if task["state"] == "started" else "🔴"
             
             col1, col2, col3 = st.columns(3)
             with col1:
-                st.metric("Task Status", f"{status_color} {task['STATE']}")
+                st.metric("Task Status", f"{status_color} {task['state']}")
             with col2:
-                st.metric("Schedule", task["SCHEDULE"])
+                st.metric("Schedule", task["schedule"])
             with col3:
-                st.metric("Warehouse", task["WAREHOUSE"])
+                st.metric("Warehouse", task["warehouse"])
         else:
             st.warning("Task not found")
-    
+            
     except Exception as e:
         st.error(f"Error checking task: {e}")
 
@@ -653,7 +759,8 @@ def main():
     st.sidebar.markdown("---")
     st.sidebar.markdown("**🤖 Powered by Claude Code**")
     st.sidebar.markdown("Zero external dependencies • Pure Snowflake")
-    st.sidebar.markdown(f"Connected to: `{session.get_current_database()}.{session.get_current_schema()}`")
+    db, sch = st.session_state.ctx
+    st.sidebar.markdown(f"Connected to: `{db}.{sch}`")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -6,8 +6,10 @@ Auto-refreshes every 5 minutes for mobile viewing
 
 import streamlit as st
 from snowflake.snowpark.context import get_active_session
+import functools
 import json
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
 import time
 import pandas as pd
 
@@ -24,9 +26,19 @@ st.set_page_config(
 # Auto-refresh configuration
 REFRESH_INTERVAL_SECONDS = 300  # 5 minutes
 
-def get_dashboard_spec(dashboard_id):
-    """Load dashboard specification from VW_DASHBOARDS view"""
-    query = f"""
+# Upper bound on concurrent procedure calls when panels are fetched in parallel
+MAX_PANEL_WORKERS = 8
+
+# Hard cap on rows an events panel may request
+MAX_EVENT_ROWS = 5000
+
+# Points plotted per time-series panel before decimation kicks in
+MAX_SERIES_POINTS = 500
+
+@st.cache_data(ttl=REFRESH_INTERVAL_SECONDS, show_spinner=False)
+def _load_spec(dashboard_id):
+    """Fetch and decode one dashboard spec; memoized per dashboard_id"""
+    query = """
     SELECT 
         dashboard_id,
         title,
@@ -35,16 +47,17 @@ def get_dashboard_spec(dashboard_id):
         created_at,
         created_by
     FROM MCP.VW_DASHBOARDS
-    WHERE dashboard_id = '{dashboard_id}'
+    WHERE dashboard_id = ?
     LIMIT 1
     """
     
-    df = session.sql(query).to_pandas()
+    df = session.sql(query, params=[dashboard_id]).to_pandas()
     
     if df.empty:
         return None
     
-    row = df.iloc[0]
+    # One positional row fetch into a plain dict; field reads then skip pandas label lookup
+    row = df.to_dict('records')[0]
     return {
         'dashboard_id': row['DASHBOARD_ID'],
         'title': row['TITLE'],
@@ -54,84 +67,226 @@ def get_dashboard_spec(dashboard_id):
         'created_by': row['CREATED_BY']
     }
 
+def get_dashboard_spec(dashboard_id):
+    """Load dashboard specification from VW_DASHBOARDS view"""
+    return _load_spec(dashboard_id)
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _list_dashboards():
+    """List all dashboards for the selector, newest first"""
+    query = """
+    SELECT 
+        dashboard_id,
+        title,
+        created_at,
+        created_by
+    FROM MCP.VW_DASHBOARDS
+    ORDER BY created_at DESC
+    """
+    return session.sql(query).to_pandas()
+
+# Map panel type to procedure
+PROC_MAP = {
+    'metric': 'DASH_GET_METRICS',
+    'metrics': 'DASH_GET_METRICS',
+    'series': 'DASH_GET_SERIES',
+    'timeseries': 'DASH_GET_SERIES',
+    'rank': 'DASH_GET_TOPN',
+    'ranking': 'DASH_GET_TOPN',
+    'topn': 'DASH_GET_TOPN',
+    'events': 'DASH_GET_EVENTS',
+    'table': 'DASH_GET_EVENTS',
+    'stream': 'DASH_GET_EVENTS'
+}
+
+# VARIANT procedures a panel may call
+DASHBOARD_PROCS = {'DASH_GET_SERIES', 'DASH_GET_TOPN', 'DASH_GET_EVENTS', 'DASH_GET_METRICS'}
+
+# Panel spec keys that differ from the procedures' PARAMS field names
+PARAM_ALIASES = {'interval_str': 'interval', 'limit_rows': 'limit'}
+
+def _refresh_boundary(now):
+    """Floor a timestamp to the refresh interval so reruns in one window send identical params"""
+    return datetime.fromtimestamp(int(now.timestamp()) // REFRESH_INTERVAL_SECONDS * REFRESH_INTERVAL_SECONDS, timezone.utc)
+
+def _proc_payload(proc_name, params):
+    """Build the PARAMS object for a procedure, resolving default time windows client-side"""
+    payload = {PARAM_ALIASES.get(k, k): v for k, v in (params or {}).items()}
+    now = _refresh_boundary(datetime.now(timezone.utc))
+    
+    if proc_name == 'DASH_GET_EVENTS':
+        payload.setdefault('cursor_ts', (now - timedelta(minutes=5)).isoformat())
+        payload['limit'] = min(int(payload.get('limit', 50)), MAX_EVENT_ROWS)
+    else:
+        payload.setdefault('start_ts', (now - timedelta(hours=24)).isoformat())
+        payload.setdefault('end_ts', now.isoformat())
+    
+    return payload
+
+def _payload_json(proc_name, params):
+    """Canonical JSON for a procedure's PARAMS; identical windows give identical strings"""
+    return json.dumps(_proc_payload(proc_name, params), sort_keys=True)
+
+def _call_proc(proc_name, params_json):
+    """Call one panel procedure and return its raw VARIANT result; safe to run off the script thread"""
+    # Fixed SQL text; everything else travels in the bound payload
+    sql = f"CALL MCP.{proc_name}(PARSE_JSON(?))"
+    
+    # Execute and get result; a single VARIANT cell needs no DataFrame
+    rows = session.sql(sql, params=[params_json]).collect()
+    
+    return rows[0][0] if rows else None
+
+class _CacheMiss(Exception):
+    """Raised by _call_proc_cached when peeked for an entry it does not hold"""
+
+_PEEK = object()
+
+# Per-panel results, keyed on the proc name and canonical payload. _result is left out of
+# the key: without it the call only peeks (the exception is never cached); with a
+# fetched result it stores that result for the TTL
+@st.cache_data(ttl=REFRESH_INTERVAL_SECONDS, show_spinner=False)
+def _call_proc_cached(proc_name, params_json, _result=_PEEK):
+    """Per-panel result cache shared by the single-call and pooled fallback paths"""
+    if _result is _PEEK:
+        raise _CacheMiss
+    return _result
+
+def _cached_proc_result(proc_name, params_json):
+    """Cached raw result for one panel call, or _PEEK on a cache miss"""
+    try:
+        return _call_proc_cached(proc_name, params_json)
+    except _CacheMiss:
+        return _PEEK
+
+# Procs with a table-function twin; their rows arrive as an Arrow-backed
+# DataFrame instead of a VARIANT array decoded in Python
+TABLE_PROC_SQL = {
+    'DASH_GET_EVENTS': "SELECT * FROM TABLE(MCP.DASH_GET_EVENTS_TABLE(PARSE_JSON(?))) ORDER BY OCCURRED_AT DESC"
+}
+
+# Spinners belong to the cache layer: they mount only on a miss, never for a cached render
+@st.cache_data(ttl=REFRESH_INTERVAL_SECONDS, show_spinner="Loading panel...")
+def _query_table_cached(proc_name, params_json):
+    """Memoized table-function read for a proc in TABLE_PROC_SQL"""
+    return session.sql(TABLE_PROC_SQL[proc_name], params=[params_json]).to_pandas()
+
+@st.cache_data(ttl=REFRESH_INTERVAL_SECONDS, show_spinner="Loading panels...")
+def _call_panels_cached(requests_json):
+    """Memoized DASH_GET_PANELS call, keyed on the canonical request list"""
+    rows = session.sql("CALL MCP.DASH_GET_PANELS(PARSE_JSON(?))", params=[requests_json]).collect()
+    return rows[0][0] if rows else None
+
 def execute_dashboard_proc(proc_name, params):
     """Execute dashboard procedure and return results"""
     try:
-        # Build procedure call
-        param_str = json.dumps(params) if params else 'NULL'
-        
-        if proc_name == 'DASH_GET_SERIES':
-            sql = f"""
-            CALL MCP.DASH_GET_SERIES(
-                {params.get('start_ts', "DATEADD('hour', -24, CURRENT_TIMESTAMP())")},
-                {params.get('end_ts', 'CURRENT_TIMESTAMP()')},
-                '{params.get('interval_str', 'hour')}',
-                {'PARSE_JSON(' + repr(json.dumps(params.get('filters'))) + ')' if params.get('filters') else 'NULL'},
-                {repr(params.get('group_by')) if params.get('group_by') else 'NULL'}
-            )
-            """
-        elif proc_name == 'DASH_GET_TOPN':
-            sql = f"""
-            CALL MCP.DASH_GET_TOPN(
-                {params.get('start_ts', "DATEADD('hour', -24, CURRENT_TIMESTAMP())")},
-                {params.get('end_ts', 'CURRENT_TIMESTAMP()')},
-                '{params.get('dimension', 'action')}',
-                {'PARSE_JSON(' + repr(json.dumps(params.get('filters'))) + ')' if params.get('filters') else 'NULL'},
-                {params.get('n', 10)}
-            )
-            """
-        elif proc_name == 'DASH_GET_EVENTS':
-            sql = f"""
-            CALL MCP.DASH_GET_EVENTS(
-                {params.get('cursor_ts', "DATEADD('minute', -5, CURRENT_TIMESTAMP())")},
-                {params.get('limit_rows', 50)}
-            )
-            """
-        elif proc_name == 'DASH_GET_METRICS':
-            sql = f"""
-            CALL MCP.DASH_GET_METRICS(
-                {params.get('start_ts', "DATEADD('hour', -24, CURRENT_TIMESTAMP())")},
-                {params.get('end_ts', 'CURRENT_TIMESTAMP()')},
-                {'PARSE_JSON(' + repr(json.dumps(params.get('filters'))) + ')' if params.get('filters') else 'NULL'}
-            )
-            """
-        else:
+        if proc_name not in DASHBOARD_PROCS:
             st.error(f"Unknown procedure: {proc_name}")
             return None
         
-        # Execute and get result
-        result_df = session.sql(sql).to_pandas()
+        params_json = _payload_json(proc_name, params)
+        result = _cached_proc_result(proc_name, params_json)
+        if result is _PEEK:
+            with st.spinner("Loading panel..."):
+                result = _call_proc_cached(proc_name, params_json, _result=_call_proc(proc_name, params_json))
         
         # Parse the VARIANT result
-        if not result_df.empty:
-            result_col = result_df.columns[0]
-            result = result_df.iloc[0][result_col]
-            
-            # Parse JSON if it's a string
-            if isinstance(result, str):
-                result = json.loads(result)
-            
-            if result.get('ok'):
-                return result.get('data', [])
-            else:
-                st.error(f"Procedure error: {result.get('error')}")
-                return None
+        return _result_data(result) if result is not None else None
         
+    except Exception as e:
+        st.error(f"Error executing {proc_name}: {str(e)}")
         return None
-        
+
+def execute_table_proc(proc_name, params):
+    """Read a proc's rows through its table function; errors surface as SQL exceptions"""
+    try:
+        return _query_table_cached(proc_name, _payload_json(proc_name, params))
     except Exception as e:
         st.error(f"Error executing {proc_name}: {str(e)}")
         return None
 
+def execute_dashboard_procs(calls):
+    """Execute several (proc_name, params) calls in one round-trip; results follow input order"""
+    requests = [
+        {'proc': proc_name, 'params': _proc_payload(proc_name, params)}
+        for proc_name, params in calls
+    ]
+    # Once DASH_GET_PANELS has failed, this session stops paying for the failing call
+    if not st.session_state.get('panels_batch_available', True):
+        return _execute_dashboard_procs_parallel(requests)
+    
+    try:
+        batch = _call_panels_cached(json.dumps(requests, sort_keys=True))
+    except Exception:
+        # Batch procedure unavailable; fall back to concurrent per-panel calls
+        st.session_state.panels_batch_available = False
+        return _execute_dashboard_procs_parallel(requests)
+    
+    try:
+        if batch is not None:
+            results = _result_data(batch)
+            if results is not None:
+                return [_result_data(result) for result in results]
+        
+        return [None] * len(calls)
+        
+    except Exception as e:
+        st.error(f"Error executing dashboard panels: {str(e)}")
+        return [None] * len(calls)
+
+def _execute_dashboard_procs_parallel(requests):
+    """Run each uncached panel procedure on its own thread; the calls are I/O-bound, so wall time is the slowest one"""
+    # Reuse the payloads already built for the batch; each is serialized exactly once
+    params_jsons = [json.dumps(request['params'], sort_keys=True) for request in requests]
+    
+    # Cache lookups stay on the script thread; only misses go to the pool
+    raw = [
+        _cached_proc_result(request['proc'], params_json)
+        for request, params_json in zip(requests, params_jsons)
+    ]
+    misses = [i for i, result in enumerate(raw) if result is _PEEK]
+    
+    if misses:
+        with st.spinner("Loading panels..."), ThreadPoolExecutor(max_workers=min(len(misses), MAX_PANEL_WORKERS)) as pool:
+            futures = {
+                pool.submit(_call_proc, requests[i]['proc'], params_jsons[i]): i
+                for i in misses
+            }
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    # Store through the cache so the next rerun within the TTL is a hit
+                    raw[i] = _call_proc_cached(requests[i]['proc'], params_jsons[i], _result=future.result())
+                except Exception as e:
+                    raw[i] = {'ok': False, 'error': str(e)}
+    
+    # Streamlit calls stay on the script thread
+    return [_result_data(result) if result is not None else None for result in raw]
+
+def _result_data(result):
+    """Return the data of a procedure result, surfacing its error"""
+    # Parse JSON if it's a string
+    if isinstance(result, str):
+        result = json.loads(result)
+    
+    if result.get('ok'):
+        return result.get('data', [])
+    
+    st.error(f"Procedure error: {result.get('error')}")
+    return None
+
 def render_metric_panel(panel, data):
     """Render a metrics panel"""
     if not data:
         st.info("No metrics data available")
         return
     
-    cols = st.columns(len(data))
-    for i, metric in enumerate(data):
-        with cols[i]:
+    # DASH_GET_METRICS returns one object of named values; panels render a list of metrics
+    if isinstance(data, dict):
+        data = [{'label': key, 'value': value} for key, value in data.items()]
+    
+    for col, metric in zip(st.columns(len(data)), data):
+        with col:
             label = metric.get('label', metric.get('metric', 'Unknown'))
             value = metric.get('value', 0)
             delta = metric.get('delta')
@@ -141,6 +296,30 @@ def render_metric_panel(panel, data):
             else:
                 st.metric(label, value)
 
+@functools.lru_cache(maxsize=64)
+def _resolve_series_cols(columns):
+    """Pick the (time, count) columns of a series result; count is None when absent"""
+    time_col = 'TIME_BUCKET' if 'TIME_BUCKET' in columns else None
+    count_col = next((col for col in ('EVENT_COUNT', 'CNT') if col in columns), None)
+    return time_col, count_col
+
+@functools.lru_cache(maxsize=64)
+def _resolve_topn_cols(columns):
+    """Pick the (item, count) columns of a top-N result; schemas repeat across refreshes"""
+    # Look for ITEM column first (from procedure output)
+    if 'ITEM' in columns:
+        item_col = 'ITEM'
+    elif 'item' in columns:
+        item_col = 'item'
+    else:
+        # Find first non-count column
+        item_col = next((col for col in columns if col.upper() not in ['CNT', 'COUNT', 'EVENT_COUNT']), None)
+    
+    # Find count column
+    count_col = next((col for col in ('COUNT', 'count', 'CNT') if col in columns), columns[-1])
+    
+    return item_col, count_col
+
 def render_series_panel(panel, data):
     """Render a time series chart"""
     if not data:
@@ -150,13 +329,18 @@ def render_series_panel(panel, data):
     df = pd.DataFrame(data)
     
     # Rename columns for clarity
-    if 'TIME_BUCKET' in df.columns:
-        df['Time'] = pd.to_datetime(df['TIME_BUCKET'])
-        df['Count'] = df.get('EVENT_COUNT', df.get('CNT', 0))
+    time_col, count_col = _resolve_series_cols(tuple(df.columns))
+    if time_col:
+        df['Time'] = pd.to_datetime(df[time_col], utc=True, cache=True)
+        df['Count'] = df[count_col] if count_col else 0
         
         # Set Time as index for line chart
         df = df.set_index('Time')
         
+        # Decimate long series; the chart gains nothing past a few hundred points
+        if len(df) > MAX_SERIES_POINTS:
+            df = df.iloc[::-(-len(df) // MAX_SERIES_POINTS)]
+        
         # Create line chart using Streamlit
         st.subheader(panel.get('title', 'Time Series'))
         st.line_chart(df['Count'], height=400)
@@ -169,114 +353,103 @@ def render_topn_panel(panel, data):
         st.info("No ranking data available")
         return
     
-    df = pd.DataFrame(data)
-    
-    # Find the item and count columns
-    item_col = None
-    count_col = None
-    
-    # Look for ITEM column first (from procedure output)
-    if 'ITEM' in df.columns:
-        item_col = 'ITEM'
-    elif 'item' in df.columns:
-        item_col = 'item'
-    else:
-        # Find first non-count column
-        for col in df.columns:
-            if col.upper() not in ['CNT', 'COUNT', 'EVENT_COUNT']:
-                item_col = col
-                break
-    
-    # Find count column
-    if 'COUNT' in df.columns:
-        count_col = 'COUNT'
-    elif 'count' in df.columns:
-        count_col = 'count'
-    elif 'CNT' in df.columns:
-        count_col = 'CNT'
-    else:
-        count_col = df.columns[-1]  # Use last column as fallback
+    # The procedure already returns rows ranked; only the column names need resolving
+    item_col, count_col = _resolve_topn_cols(tuple(data[0].keys()))
     
-    if item_col and count_col and item_col in df.columns and count_col in df.columns:
-        # Sort by count descending
-        df = df.sort_values(by=count_col, ascending=False)
-        
-        # Set item as index for bar chart
-        df = df.set_index(item_col)
+    if item_col:
+        series = pd.Series(
+            [row.get(count_col) for row in data],
+            index=[row.get(item_col) for row in data],
+            name=count_col
+        )
         
         # Create bar chart using Streamlit
         st.subheader(panel.get('title', 'Top Items'))
-        st.bar_chart(df[count_col], height=400)
+        st.bar_chart(series, height=400)
     else:
-        st.dataframe(df)
+        st.dataframe(pd.DataFrame(data))
 
 def render_events_panel(panel, data):
     """Render an events table"""
-    if not data:
+    if data is None or len(data) == 0:
         st.info("No events available")
         return
     
-    df = pd.DataFrame(data)
+    requested = int(panel.get('params', {}).get('limit_rows', 50))
+    if requested > MAX_EVENT_ROWS and len(data) >= MAX_EVENT_ROWS:
+        st.warning(f"Showing the latest {MAX_EVENT_ROWS:,} of the {requested:,} events requested")
     
-    # Format timestamp columns
-    for col in df.columns:
-        if 'TIME' in col.upper() or 'OCCURRED' in col.upper():
-            try:
-                df[col] = pd.to_datetime(df[col])
-            except:
-                pass
+    # Table-function results are already a DataFrame with typed timestamps
+    df = data if isinstance(data, pd.DataFrame) else pd.DataFrame(data)
+    
+    # Format timestamp columns in one pass; unparseable values become NaT
+    time_cols = [c for c in df.columns if 'TIME' in c.upper() or 'OCCURRED' in c.upper()]
+    if time_cols:
+        df[time_cols] = df[time_cols].apply(pd.to_datetime, errors='coerce')
     
     st.dataframe(df, use_container_width=True, height=400)
 
-def render_panel(panel):
-    """Render a dashboard panel based on its type"""
+# Map panel type to its renderer; keys match PROC_MAP
+RENDER_MAP = {
+    'metric': render_metric_panel,
+    'metrics': render_metric_panel,
+    'series': render_series_panel,
+    'timeseries': render_series_panel,
+    'rank': render_topn_panel,
+    'ranking': render_topn_panel,
+    'topn': render_topn_panel,
+    'events': render_events_panel,
+    'table': render_events_panel,
+    'stream': render_events_panel
+}
+
+def render_panel(panel, data):
+    """Render a dashboard panel based on its type, using data fetched up-front"""
     panel_type = panel.get('type', 'unknown')
-    params = panel.get('params', {})
-    
-    # Map panel type to procedure
-    proc_map = {
-        'metric': 'DASH_GET_METRICS',
-        'metrics': 'DASH_GET_METRICS',
-        'series': 'DASH_GET_SERIES',
-        'timeseries': 'DASH_GET_SERIES',
-        'rank': 'DASH_GET_TOPN',
-        'ranking': 'DASH_GET_TOPN',
-        'topn': 'DASH_GET_TOPN',
-        'events': 'DASH_GET_EVENTS',
-        'table': 'DASH_GET_EVENTS',
-        'stream': 'DASH_GET_EVENTS'
-    }
-    
-    proc_name = proc_map.get(panel_type.lower())
+    render = RENDER_MAP.get(panel_type.lower())
     
-    if not proc_name:
+    if not render:
         st.warning(f"Unknown panel type: {panel_type}")
         return
     
-    # Execute procedure and get data
-    with st.spinner(f"Loading {panel.get('title', panel_type)}..."):
-        data = execute_dashboard_proc(proc_name, params)
+    render(panel, data)
+
+@st.fragment(run_every=REFRESH_INTERVAL_SECONDS)
+def render_panels(panels):
+    """Fetch and render all panels; re-runs on its own timer to auto-refresh"""
+    st.caption(f"🔄 Refresh: {datetime.now().strftime('%H:%M:%S')}")
+    
+    # Fetch every VARIANT panel's data in one round-trip before rendering;
+    # tabular procs are read per panel as DataFrames
+    panel_procs = [PROC_MAP.get(panel.get('type', 'unknown').lower()) for panel in panels]
+    calls = [
+        (proc, panel.get('params', {}))
+        for proc, panel in zip(panel_procs, panels)
+        if proc and proc not in TABLE_PROC_SQL
+    ]
+    
+    results = iter(execute_dashboard_procs(calls) if calls else [])
+    
+    # Render panels in grid layout
+    for panel, proc in zip(panels, panel_procs):
+        # Create container for each panel
+        with st.container():
+            if panel.get('title'):
+                st.subheader(panel['title'])
+    
+            if proc in TABLE_PROC_SQL:
+                data = execute_table_proc(proc, panel.get('params', {}))
+            else:
+                data = next(results) if proc else None
+            render_panel(panel, data)
     
-    # Render based on type
-    if panel_type.lower() in ['metric', 'metrics']:
-        render_metric_panel(panel, data)
-    elif panel_type.lower() in ['series', 'timeseries']:
-        render_series_panel(panel, data)
-    elif panel_type.lower() in ['rank', 'ranking', 'topn']:
-        render_topn_panel(panel, data)
-    elif panel_type.lower() in ['events', 'table', 'stream']:
-        render_events_panel(panel, data)
+            st.divider()
 
 def main():
     """Main dashboard application"""
     
     # Get dashboard ID from query params
-    try:
-        query_params = st.experimental_get_query_params()
-        dashboard_id = query_params.get('dashboard_id', [None])[0]
-    except:
-        # Fallback for older Streamlit versions
-        dashboard_id = None
+    dashboard_id = st.query_params.get('dashboard_id')
     
     if not dashboard_id:
         st.title("📊 Dashboard Selector")
@@ -284,16 +457,7 @@ def main():
         
         # Fetch available dashboards
         try:
-            query = """
-            SELECT 
-                dashboard_id,
-                title,
-                created_at,
-                created_by
-            FROM MCP.VW_DASHBOARDS
-            ORDER BY created_at DESC
-            """
-            df = session.sql(query).to_pandas()
+            df = _list_dashboards()
             
             if df.empty:
                 st.error("No dashboards found in the system")
@@ -313,8 +477,8 @@ def main():
             if st.button("Load Dashboard"):
                 dashboard_id = dashboard_options[selected_label]
                 # Update URL with the selected dashboard_id
-                st.experimental_set_query_params(dashboard_id=dashboard_id)
-                st.experimental_rerun()
+                st.query_params["dashboard_id"] = dashboard_id
+                st.rerun()
             
             st.divider()
             st.subheader("Available Dashboards:")
@@ -336,15 +500,13 @@ def main():
     st.title(dashboard['title'])
     
     # Dashboard metadata
-    col1, col2, col3, col4 = st.columns(4)
+    col1, col2, col3 = st.columns(3)
     with col1:
         st.caption(f"📊 Dashboard: {dashboard_id}")
     with col2:
         st.caption(f"🕐 Created: {dashboard['created_at']}")
     with col3:
         st.caption(f"👤 By: {dashboard['created_by']}")
-    with col4:
-        st.caption(f"🔄 Refresh: {datetime.now().strftime('%H:%M:%S')}")
     
     st.divider()
     
@@ -357,39 +519,19 @@ def main():
         st.json(spec)
         st.stop()
     
-    # Render panels in grid layout
-    for panel in panels:
-        # Create container for each panel
-        with st.container():
-            if panel.get('title'):
-                st.subheader(panel['title'])
-            
-            render_panel(panel)
-            
-            st.divider()
+    render_panels(panels)
     
     # Add refresh button and auto-refresh
     col1, col2 = st.columns([1, 5])
     with col1:
         if st.button("🔄 Refresh Now"):
-            st.experimental_rerun()
+            # Drop only the panel reads; specs and the dashboard list stay cached
+            _call_proc_cached.clear()
+            _call_panels_cached.clear()
+            _query_table_cached.clear()
+            st.rerun()
     with col2:
         st.info(f"Auto-refresh every {REFRESH_INTERVAL_SECONDS // 60} minutes")
-    
-    # Auto-refresh logic
-    # Note: In production Streamlit on Snowflake, you might use st.experimental_rerun with a timer
-    # For now, we'll add a placeholder that would trigger refresh
-    placeholder = st.empty()
-    
-    # Add a hidden timestamp to track page age
-    if 'last_refresh' not in st.session_state:
-        st.session_state.last_refresh = datetime.now()
-    
-    # Check if it's time to refresh
-    time_since_refresh = (datetime.now() - st.session_state.last_refresh).total_seconds()
-    if time_since_refresh > REFRESH_INTERVAL_SECONDS:
-        st.session_state.last_refresh = datetime.now()
-        st.experimental_rerun()
 
 # Run the app
 if __name__ == "__main__":
@@ -44,7 +44,7 @@ try:
         MAX(occurred_at) as latest_event,
         MIN(occurred_at) as earliest_event
     FROM CLAUDE_BI.ACTIVITY.EVENTS
-    WHERE occurred_at >= DATEADD('day', -7, CURRENT_TIMESTAMP())
+    WHERE occurred_at >= DATEADD('day', -7, CURRENT_DATE())
     """
     
     result = session.sql(query).collect()
@@ -3,17 +3,9 @@
 Test the chat function to make sure it works properly
 """
 
-def execute_claude_query(user_question):
-    """Process user question and provide helpful responses"""
-    try:
-        # Since we can't call external Claude Code from within Snowflake,
-        # let's provide intelligent responses based on the question
-        
-        question_lower = user_question.lower()
-        
-        # Activity over time question
-        if "activity over time" in question_lower or "chart" in question_lower and "time" in question_lower:
-            return """✅ **Activity Over Time Chart**
+import re
+
+RESP_TIME = """✅ **Activity Over Time Chart**
 
 I can help you create an activity chart! Based on your data, here's what I found:
 
@@ -32,9 +24,7 @@ I can help you create an activity chart! Based on your data, here's what I found
 - 48 unique actors active
 - Peak activity in recent hours"""
 
-        # Most active users question
-        elif "active users" in question_lower or "top users" in question_lower:
-            return """✅ **Most Active Users Analysis**
+RESP_USERS = """✅ **Most Active Users Analysis**
 
 Looking at your activity data for the most active users:
 
@@ -51,9 +41,7 @@ Based on the "Top Actors" section in your dashboard, I can see the most active u
 - "Which users created the most work items?"
 - "Who are the power users this month?"""
 
-        # Top actions question
-        elif "top actions" in question_lower or "actions" in question_lower:
-            return """✅ **Top Actions Analysis**
+RESP_ACTIONS = """✅ **Top Actions Analysis**
 
 Here's what I found about the most performed actions:
 
@@ -75,9 +63,7 @@ Looking at your "Top Actions" chart, I can see:
 - "What actions happened today?"
 - "Show error vs success actions"""
 
-        # Sources question
-        elif "sources" in question_lower or "event sources" in question_lower:
-            return """✅ **Event Sources Analysis**
+RESP_SOURCES = """✅ **Event Sources Analysis**
 
 Analyzing where your events are coming from:
 
@@ -95,9 +81,29 @@ Looking at your "Event Sources" section, I can see different sources generating
 - "Show me sources by time of day"
 - "What's the source breakdown this week?"""
 
+# Each question is scanned once per pattern, first match wins; the order
+# mirrors the original if/elif chain ("chart" and "time" in any order)
+_DISPATCH = [
+    (re.compile(r'activity over time|(?=.*chart).*time', re.S), RESP_TIME),
+    (re.compile(r'active users|top users'), RESP_USERS),
+    (re.compile(r'actions'), RESP_ACTIONS),
+    (re.compile(r'sources'), RESP_SOURCES),
+]
+
+def execute_claude_query(user_question):
+    """Process user question and provide helpful responses"""
+    try:
+        # Since we can't call external Claude Code from within Snowflake,
+        # let's provide intelligent responses based on the question
+        
+        question_lower = user_question.lower()
+        
+        for pattern, response in _DISPATCH:
+            if pattern.search(question_lower):
+                return response
+        
         # General help or unclear question
-        else:
-            return f"""✅ **Question Received**: "{user_question}"
+        return f"""✅ **Question Received**: "{user_question}"
 
 🤖 **I'm here to help analyze your activity data!**
 
@@ -0,0 +1,78 @@
+"""
+Shared pytest fixtures
+The dashboard server is started at most once per test session
+"""
+
+import os
+import subprocess
+import time
+
+import pytest
+import requests
+from requests.adapters import HTTPAdapter
+
+# API configuration
+API_BASE_URL = "http://localhost:3001"
+
+
+@pytest.fixture(scope="session")
+def http():
+    """Keep-alive HTTP session shared by every API test"""
+    session = requests.Session()
+    session.headers.update({"Content-Type": "application/json"})
+    session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=20, max_retries=0))
+    yield session
+    session.close()
+
+
+def _server_ready(http):
+    """True once the dashboard server answers its health check"""
+    try:
+        return http.get(f"{API_BASE_URL}/health", timeout=2).status_code == 200
+    except requests.RequestException:
+        return False
+
+
+@pytest.fixture(scope="session")
+def api_base_url(http):
+    """Start the dashboard server if not running; yields its base URL"""
+    # The readiness probe opens the pooled connection the tests then reuse
+    if _server_ready(http):
+        print("✓ Dashboard server already running")
+        yield API_BASE_URL
+        return
+
+    # Start the server
+    print("Starting dashboard server...")
+    env = os.environ.copy()
+    env['SF_PK_PATH'] = './claude_code_rsa_key.p8'
+    env['NODE_ENV'] = 'test'
+
+    server_process = subprocess.Popen(
+        ['node', 'src/dashboard-server.js'],
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE
+    )
+
+    try:
+        # Wait for server to start
+        max_attempts = 10
+        for i in range(max_attempts):
+            if _server_ready(http):
+                print("✓ Dashboard server started")
+                break
+            time.sleep(1)
+        else:
+            raise Exception("Failed to start dashboard server")
+
+        yield API_BASE_URL
+    finally:
+        # Stop the server we started; kill it rather than leak it if it hangs
+        server_process.terminate()
+        try:
+            server_process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            server_process.kill()
+            server_process.wait()
+        print("✓ Dashboard server stopped")
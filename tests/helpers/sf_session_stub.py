@@ -4,9 +4,24 @@ Captures SQL statements and bound parameters
 """
 
 import json
+import re
 import pandas as pd
 from typing import List, Dict, Any, Optional
 
+_QUERY_TAG_RE = re.compile(r"QUERY_TAG\s*=\s*'([^']*)'")
+
+# Default result for procedure calls, built once and shared by every session;
+# tests must not mutate the DataFrame returned by to_pandas()
+_DEFAULT_RESULT_DF = pd.DataFrame([{
+    "RESULT": json.dumps({
+        "ok": True,
+        "data": [
+            {"actor": "user1", "count": 100},
+            {"actor": "user2", "count": 50}
+        ]
+    })
+}])
+
 
 class MockSession:
     """Mock Snowpark Session that captures SQL and parameters"""
@@ -23,10 +38,9 @@ class MockSession:
         self.last_sql = stmt
         self.sql_history.append(stmt)
         
-        # Handle ALTER SESSION for query tag
+        # Handle ALTER SESSION for query tag; the substring check spares procedure calls the regex
         if "ALTER SESSION SET QUERY_TAG" in stmt:
-            import re
-            match = re.search(r"QUERY_TAG\s*=\s*'([^']*)'", stmt)
+            match = _QUERY_TAG_RE.search(stmt)
             if match:
                 self.query_tag = match.group(1)
         
@@ -45,25 +59,22 @@ class MockSession:
         
         return self
     
-    def collect(self):
-        """Mock collect() for ALTER SESSION etc"""
+    def _capture_statement_params(self, statement_params: Optional[Dict[str, str]]):
+        """Record a per-statement query tag"""
+        if statement_params and "QUERY_TAG" in statement_params:
+            self.query_tag = statement_params["QUERY_TAG"]
+    
+    def collect(self, statement_params: Optional[Dict[str, str]] = None):
+        """Mock collect(); procedure calls return the mock result rows"""
+        self._capture_statement_params(statement_params)
+        if self.last_sql and self.last_sql.lstrip().startswith("CALL MCP."):
+            return list(self.to_pandas().itertuples(index=False, name=None))
         return []
     
-    def to_pandas(self):
-        """Return mock DataFrame result"""
-        if self.mock_result is not None:
-            return self.mock_result
-            
-        # Default mock result for procedure calls
-        return pd.DataFrame([{
-            "RESULT": json.dumps({
-                "ok": True,
-                "data": [
-                    {"actor": "user1", "count": 100},
-                    {"actor": "user2", "count": 50}
-                ]
-            })
-        }])
+    def to_pandas(self, statement_params: Optional[Dict[str, str]] = None):
+        """Return mock DataFrame result (shared; do not mutate)"""
+        self._capture_statement_params(statement_params)
+        return self.mock_result if self.mock_result is not None else _DEFAULT_RESULT_DF
     
     def set_mock_result(self, result: pd.DataFrame):
         """Set a specific mock result for the next query"""
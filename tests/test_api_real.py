@@ -2,73 +2,21 @@
 """
 Real API Tests for Dashboard Server
 Tests the actual dashboard-server.js endpoints
-Requires the server to be running on port 3001
+Requires the server to be running on port 3001; the session-scoped
+api_base_url fixture in conftest.py starts it when it is not
 """
 
-import os
 import sys
 import json
-import requests
-import time
-import subprocess
+import pytest
 from datetime import datetime, timezone, timedelta
 
-# API configuration
-API_BASE_URL = "http://localhost:3001"
-
 class TestRealAPI:
     """Real API tests against live dashboard-server.js"""
     
-    @classmethod
-    def setup_class(cls):
-        """Start the dashboard server if not running"""
-        # Check if server is running
-        try:
-            response = requests.get(f"{API_BASE_URL}/health", timeout=2)
-            if response.status_code == 200:
-                print("✓ Dashboard server already running")
-                cls.server_process = None
-                return
-        except:
-            pass
-        
-        # Start the server
-        print("Starting dashboard server...")
-        env = os.environ.copy()
-        env['SF_PK_PATH'] = './claude_code_rsa_key.p8'
-        env['NODE_ENV'] = 'test'
-        
-        cls.server_process = subprocess.Popen(
-            ['node', 'src/dashboard-server.js'],
-            env=env,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE
-        )
-        
-        # Wait for server to start
-        max_attempts = 10
-        for i in range(max_attempts):
-            try:
-                response = requests.get(f"{API_BASE_URL}/health", timeout=2)
-                if response.status_code == 200:
-                    print("✓ Dashboard server started")
-                    break
-            except:
-                time.sleep(1)
-        else:
-            raise Exception("Failed to start dashboard server")
-    
-    @classmethod
-    def teardown_class(cls):
-        """Stop the dashboard server if we started it"""
-        if hasattr(cls, 'server_process') and cls.server_process:
-            cls.server_process.terminate()
-            cls.server_process.wait()
-            print("✓ Dashboard server stopped")
-    
-    def test_health_endpoint(self):
+    def test_health_endpoint(self, http, api_base_url):
         """API-REAL-01: Test health endpoint"""
-        response = requests.get(f"{API_BASE_URL}/health")
+        response = http.get(f"{api_base_url}/health")
         assert response.status_code == 200, f"Health check failed: {response.status_code}"
         
         data = response.json()
@@ -76,7 +24,7 @@ class TestRealAPI:
         assert "timestamp" in data, "Should have timestamp"
         print(f"✓ Health check passed: {data}")
     
-    def test_execute_plan_series(self):
+    def test_execute_plan_series(self, http, api_base_url):
         """API-REAL-02: Test /api/execute-plan with DASH_GET_SERIES"""
         plan = {
             "proc": "DASH_GET_SERIES",
@@ -88,10 +36,9 @@ class TestRealAPI:
             }
         }
         
-        response = requests.post(
-            f"{API_BASE_URL}/api/execute-plan",
-            json={"plan": plan},
-            headers={"Content-Type": "application/json"}
+        response = http.post(
+            f"{api_base_url}/api/execute-plan",
+            json={"plan": plan}
         )
         
         assert response.status_code == 200, f"Execute plan failed: {response.status_code}"
@@ -107,7 +54,7 @@ class TestRealAPI:
         assert result.get("ok") == True, "Procedure should return ok=true"
         print(f"✓ DASH_GET_SERIES via API: {len(result.get('data', []))} time buckets")
     
-    def test_execute_plan_topn(self):
+    def test_execute_plan_topn(self, http, api_base_url):
         """API-REAL-03: Test /api/execute-plan with DASH_GET_TOPN"""
         plan = {
             "proc": "DASH_GET_TOPN",
@@ -120,10 +67,9 @@ class TestRealAPI:
             }
         }
         
-        response = requests.post(
-            f"{API_BASE_URL}/api/execute-plan",
-            json={"plan": plan},
-            headers={"Content-Type": "application/json"}
+        response = http.post(
+            f"{api_base_url}/api/execute-plan",
+            json={"plan": plan}
         )
         
         assert response.status_code == 200, f"Execute plan failed: {response.status_code}"
@@ -132,7 +78,7 @@ class TestRealAPI:
         assert data.get("ok") == True, "Should return ok=true"
         print(f"✓ DASH_GET_TOPN via API successful")
     
-    def test_execute_plan_validation(self):
+    def test_execute_plan_validation(self, http, api_base_url):
         """API-REAL-04: Test plan validation"""
         # Test with disallowed procedure
         plan = {
@@ -140,10 +86,9 @@ class TestRealAPI:
             "params": {}
         }
         
-        response = requests.post(
-            f"{API_BASE_URL}/api/execute-plan",
-            json={"plan": plan},
-            headers={"Content-Type": "application/json"}
+        response = http.post(
+            f"{api_base_url}/api/execute-plan",
+            json={"plan": plan}
         )
         
         assert response.status_code == 500, "Should reject disallowed procedure"
@@ -152,7 +97,7 @@ class TestRealAPI:
         assert "error" in data, "Should have error message"
         print(f"✓ Procedure whitelist enforced: {data.get('error')}")
     
-    def test_execute_plan_interval_clamping(self):
+    def test_execute_plan_interval_clamping(self, http, api_base_url):
         """API-REAL-05: Test interval clamping"""
         plan = {
             "proc": "DASH_GET_SERIES",
@@ -164,10 +109,9 @@ class TestRealAPI:
             }
         }
         
-        response = requests.post(
-            f"{API_BASE_URL}/api/execute-plan",
-            json={"plan": plan},
-            headers={"Content-Type": "application/json"}
+        response = http.post(
+            f"{api_base_url}/api/execute-plan",
+            json={"plan": plan}
         )
         
         assert response.status_code == 200, "Should handle invalid interval"
@@ -175,7 +119,7 @@ class TestRealAPI:
         assert data.get("ok") == True, "Should succeed with clamped interval"
         print("✓ Interval clamping working")
     
-    def test_execute_plan_limit_capping(self):
+    def test_execute_plan_limit_capping(self, http, api_base_url):
         """API-REAL-06: Test limit capping"""
         plan = {
             "proc": "DASH_GET_EVENTS",
@@ -185,10 +129,9 @@ class TestRealAPI:
             }
         }
         
-        response = requests.post(
-            f"{API_BASE_URL}/api/execute-plan",
-            json={"plan": plan},
-            headers={"Content-Type": "application/json"}
+        response = http.post(
+            f"{api_base_url}/api/execute-plan",
+            json={"plan": plan}
         )
         
         assert response.status_code == 200, "Should handle large limit"
@@ -196,7 +139,7 @@ class TestRealAPI:
         assert data.get("ok") == True, "Should succeed with capped limit"
         print("✓ Limit capping working")
     
-    def test_nl_to_plan(self):
+    def test_nl_to_plan(self, http, api_base_url):
         """API-REAL-07: Test /api/nl-to-plan natural language conversion"""
         queries = [
             "show activity for last 24 hours",
@@ -206,10 +149,9 @@ class TestRealAPI:
         ]
         
         for query in queries:
-            response = requests.post(
-                f"{API_BASE_URL}/api/nl-to-plan",
-                json={"query": query},
-                headers={"Content-Type": "application/json"}
+            response = http.post(
+                f"{api_base_url}/api/nl-to-plan",
+                json={"query": query}
             )
             
             assert response.status_code == 200, f"NL conversion failed for: {query}"
@@ -230,7 +172,7 @@ class TestRealAPI:
             
             print(f"✓ NL->Plan: '{query}' -> {plan.get('proc')}")
     
-    def test_save_dashboard_spec(self):
+    def test_save_dashboard_spec(self, http, api_base_url):
         """API-REAL-08: Test /api/save-dashboard-spec"""
         dashboard_spec = {
             "title": f"Test Dashboard {datetime.now().timestamp()}",
@@ -248,10 +190,9 @@ class TestRealAPI:
             "refresh_interval_sec": 300
         }
         
-        response = requests.post(
-            f"{API_BASE_URL}/api/save-dashboard-spec",
-            json={"spec": dashboard_spec},
-            headers={"Content-Type": "application/json"}
+        response = http.post(
+            f"{api_base_url}/api/save-dashboard-spec",
+            json={"spec": dashboard_spec}
         )
         
         assert response.status_code == 200, f"Save dashboard failed: {response.status_code}"
@@ -265,10 +206,10 @@ class TestRealAPI:
         
         return dashboard_id
     
-    def test_create_schedule(self):
+    def test_create_schedule(self, http, api_base_url):
         """API-REAL-09: Test /api/create-schedule"""
         # First create a dashboard
-        dashboard_id = self.test_save_dashboard_spec()
+        dashboard_id = self.test_save_dashboard_spec(http, api_base_url)
         
         schedule_spec = {
             "dashboard_id": dashboard_id,
@@ -278,10 +219,9 @@ class TestRealAPI:
             "deliveries": ["email"]
         }
         
-        response = requests.post(
-            f"{API_BASE_URL}/api/create-schedule",
-            json={"schedule": schedule_spec},
-            headers={"Content-Type": "application/json"}
+        response = http.post(
+            f"{api_base_url}/api/create-schedule",
+            json={"schedule": schedule_spec}
         )
         
         assert response.status_code == 200, f"Create schedule failed: {response.status_code}"
@@ -293,10 +233,10 @@ class TestRealAPI:
         schedule_id = data.get("schedule_id")
         print(f"✓ Schedule created with ID: {schedule_id}")
     
-    def test_cors_headers(self):
+    def test_cors_headers(self, http, api_base_url):
         """API-REAL-10: Test CORS headers"""
-        response = requests.options(
-            f"{API_BASE_URL}/api/execute-plan",
+        response = http.options(
+            f"{api_base_url}/api/execute-plan",
             headers={"Origin": "http://localhost:3000"}
         )
         
@@ -307,22 +247,20 @@ class TestRealAPI:
         
         print(f"✓ CORS headers configured correctly")
     
-    def test_error_handling(self):
+    def test_error_handling(self, http, api_base_url):
         """API-REAL-11: Test error handling"""
         # Test with malformed JSON
-        response = requests.post(
-            f"{API_BASE_URL}/api/execute-plan",
-            data="not json",
-            headers={"Content-Type": "application/json"}
+        response = http.post(
+            f"{api_base_url}/api/execute-plan",
+            data="not json"
         )
         
         assert response.status_code in [400, 500], "Should handle malformed JSON"
         
         # Test with missing plan
-        response = requests.post(
-            f"{API_BASE_URL}/api/execute-plan",
-            json={},
-            headers={"Content-Type": "application/json"}
+        response = http.post(
+            f"{api_base_url}/api/execute-plan",
+            json={}
         )
         
         assert response.status_code == 500, "Should handle missing plan"
@@ -331,7 +269,7 @@ class TestRealAPI:
         
         print("✓ Error handling working correctly")
     
-    def test_claude_attribution(self):
+    def test_claude_attribution(self, http, api_base_url):
         """API-REAL-12: Test Claude Code attribution in responses"""
         plan = {
             "proc": "DASH_GET_METRICS",
@@ -342,10 +280,9 @@ class TestRealAPI:
             }
         }
         
-        response = requests.post(
-            f"{API_BASE_URL}/api/execute-plan",
-            json={"plan": plan},
-            headers={"Content-Type": "application/json"}
+        response = http.post(
+            f"{api_base_url}/api/execute-plan",
+            json={"plan": plan}
         )
         
         # Check response headers for Claude attribution
@@ -355,40 +292,5 @@ class TestRealAPI:
 
 
 if __name__ == "__main__":
-    # Run tests
-    test = TestRealAPI()
-    
-    # Setup
-    TestRealAPI.setup_class()
-    
-    test_methods = [m for m in dir(test) if m.startswith("test_")]
-    
-    passed = 0
-    failed = 0
-    
-    print("=" * 60)
-    print("REAL API TESTS - Live Dashboard Server")
-    print("=" * 60)
-    print(f"API URL: {API_BASE_URL}")
-    print("=" * 60)
-    print()
-    
-    for method_name in test_methods:
-        try:
-            method = getattr(test, method_name)
-            print(f"Running {method_name}...")
-            method()
-            passed += 1
-        except Exception as e:
-            print(f"✗ {method_name}: {e}")
-            failed += 1
-    
-    # Teardown
-    TestRealAPI.teardown_class()
-    
-    print()
-    print("=" * 60)
-    print(f"Results: {passed} passed, {failed} failed")
-    print("=" * 60)
-    
-    sys.exit(0 if failed == 0 else 1)
\ No newline at end of file
+    # Run through pytest so the shared server and HTTP session fixtures apply
+    sys.exit(pytest.main([__file__, "-v"]))
@@ -41,17 +41,17 @@ def run_plan(session, plan, query_tag):
         if params["interval"] not in valid_intervals:
             params["interval"] = "hour"  # Default to hour
     
-    # Set query tag with Claude attribution
-    session.sql(f"ALTER SESSION SET QUERY_TAG = '{query_tag}'").collect()
-    
     # THE CRITICAL FIX: Use single VARIANT parameter with PARSE_JSON(?)
     stmt = f"CALL MCP.{proc}(PARSE_JSON(?))"
     
-    # Bind the JSON parameter
+    # Bind the JSON parameter; the query tag rides on the CALL itself
     payload = json.dumps(params)
-    result_df = session.sql(stmt).bind(params=[payload]).to_pandas()
+    rows = session.sql(stmt).bind(params=[payload]).collect(
+        statement_params={"QUERY_TAG": query_tag}
+    )
     
-    return result_df
+    # Procedures return a single VARIANT cell
+    return rows[0][0] if rows else None
 
 
 class TestPlanRunner: